@@ -614,6 +614,8 @@ class LoginAttemptAdmin(ModelAdmin, ImportExportModelAdmin):
     search_fields = ['user__username', 'ip_address']
     readonly_fields = ['user', 'ip_address', 'user_agent', 'timestamp', 'successful']
     resource_classes = [LoginAttemptsResource]
+    # the unfiltered total needs a full COUNT on every page load
+    show_full_result_count = False
 
     def has_add_permission(self, request):
         return False
@@ -743,9 +745,20 @@ class ConstructionObjectAdmin(ModelAdmin):
         )
 
 
+class IssueDuplicateInline(StackedInline):
+    model = IssueDuplicate
+    extra = 0
+    tab = True
+    can_delete = False
+    readonly_fields = ['title', 'description', 'issue_type', 'created_by', 'latitude', 'longitude', 'reported_at']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Issue)
 class IssueAdmin(ModelAdmin):
-    inlines = [ReviewIssuePhotoInline]
+    inlines = [ReviewIssuePhotoInline, IssueDuplicateInline]
 
 
 @admin.register(Report)
@@ -800,10 +813,22 @@ class PublicIssuePhotosInline(StackedInline):
     extra = 0
 
 
+class PublicIssueDuplicateInline(StackedInline):
+    model = PublicIssueDuplicate
+    extra = 0
+    can_delete = False
+    readonly_fields = [
+        'issuer_fullname', 'issuer_phone', 'title', 'description', 'latitude', 'longitude', 'reported_at',
+    ]
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(PublicIssue)
 class PublicIssueAdmin(ModelAdmin):
-    inlines = [PublicIssuePhotosInline, ]
-    list_display = ['id', 'title', 'description', ]
+    inlines = [PublicIssuePhotosInline, PublicIssueDuplicateInline]
+    list_display = ['id', 'title', 'description', 'report_count', 'last_reported_at']
 
 
 @admin.register(ConstructionFinancing)
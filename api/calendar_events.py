@@ -0,0 +1,422 @@
+"""
+Calendar layers: project deadlines, planned inspections and issue resolve dates.
+
+Each layer is read with one ``.values()`` query that pulls the related
+columns it renders (object name, inspector username …) through joins, so
+building the events costs three queries at most regardless of the window
+size.  Windows are bounded by ``MAX_RANGE_DAYS``.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Exists, F, Max, OuterRef, Q
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from api.models import Assignment, ConstructionObject, Issue, Review
+
+PROJECT_DEADLINE = 'project_deadline'
+INSPECTION = 'inspection'
+ISSUE_RESOLVE = 'issue_resolve'
+EVENT_TYPES = (PROJECT_DEADLINE, INSPECTION, ISSUE_RESOLVE)
+
+MAX_RANGE_DAYS = 93
+DEFAULT_RANGE_DAYS = 30
+OPEN_ISSUE_STATUSES = ('open', 'in_progress')
+
+PRIORITY_COLORS = {
+    'low': '#FFD93D',
+    'medium': '#FF8C42',
+    'high': '#FF6B6B',
+    'critical': '#C92A2A'
+}
+
+
+class CalendarQueryError(ValueError):
+    """Invalid calendar query params, rendered as a 400 by the view."""
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def parse_range(params, max_days: int = MAX_RANGE_DAYS) -> tuple[datetime, datetime]:
+    """`start` / `end` query params; `end` defaults to start + 30 days."""
+    try:
+        start = _parse_datetime(params['start']) if params.get('start') else datetime.now()
+        end = _parse_datetime(params['end']) if params.get('end') else start + timedelta(days=DEFAULT_RANGE_DAYS)
+    except ValueError:
+        raise CalendarQueryError('Invalid date format')
+    if timezone.is_aware(start) != timezone.is_aware(end):
+        raise CalendarQueryError('start and end must both have or both omit a timezone')
+    if end < start:
+        raise CalendarQueryError('end must not be before start')
+    if end - start > timedelta(days=max_days):
+        raise CalendarQueryError(f'Date range must not exceed {max_days} days')
+    return start, end
+
+
+def parse_types(params) -> tuple[str, ...]:
+    """`types=inspection,issue_resolve`; all layers when omitted."""
+    raw = params.get('types')
+    if not raw:
+        return EVENT_TYPES
+    types = tuple(t.strip() for t in raw.split(',') if t.strip())
+    unknown = set(types) - set(EVENT_TYPES)
+    if unknown:
+        raise CalendarQueryError(f"Unknown event types: {', '.join(sorted(unknown))}")
+    return types
+
+
+def _parse_ids(params, name: str) -> "list[int] | None":
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        return [int(v) for v in raw.split(',') if v.strip()]
+    except ValueError:
+        raise CalendarQueryError(f'{name} must be a comma-separated list of ids')
+
+
+class CalendarScope:
+    """
+    Scope filters shared by every layer:
+
+    object=1,2        events of these construction objects
+    district=3        events of objects in these districts
+    assigned_to=me|7  inspections / issues of reviews assigned to the user;
+                      project deadlines of objects with such a review
+    """
+
+    def __init__(self, objects=None, districts=None, assigned_to=None):
+        self.objects = objects
+        self.districts = districts
+        self.assigned_to = assigned_to
+
+    @classmethod
+    def from_params(cls, params, user) -> "CalendarScope":
+        assigned_to = params.get('assigned_to')
+        if assigned_to == 'me':
+            assigned_to = user.pk
+        elif assigned_to:
+            try:
+                assigned_to = int(assigned_to)
+            except ValueError:
+                raise CalendarQueryError("assigned_to must be 'me' or a user id")
+        return cls(
+            objects=_parse_ids(params, 'object'),
+            districts=_parse_ids(params, 'district'),
+            assigned_to=assigned_to or None,
+        )
+
+    def projects_q(self) -> Q:
+        q = Q()
+        if self.objects is not None:
+            q &= Q(pk__in=self.objects)
+        if self.districts is not None:
+            q &= Q(neighborhood__district__in=self.districts)
+        if self.assigned_to is not None:
+            q &= Q(Exists(Review.objects.filter(object=OuterRef('pk'), assigned_to=self.assigned_to)))
+        return q
+
+    def reviews_q(self) -> Q:
+        q = Q()
+        if self.objects is not None:
+            q &= Q(object__in=self.objects)
+        if self.districts is not None:
+            q &= Q(object__neighborhood__district__in=self.districts)
+        if self.assigned_to is not None:
+            q &= Q(assigned_to=self.assigned_to)
+        return q
+
+    def issues_q(self) -> Q:
+        # the review's object wins; reported issues without a review carry their own
+        q = Q()
+        if self.objects is not None:
+            q &= Q(review__object__in=self.objects) | Q(review__isnull=True, object__in=self.objects)
+        if self.districts is not None:
+            q &= (
+                Q(review__object__neighborhood__district__in=self.districts)
+                | Q(review__isnull=True, object__neighborhood__district__in=self.districts)
+            )
+        if self.assigned_to is not None:
+            q &= Q(review__assigned_to=self.assigned_to)
+        return q
+
+
+# ─── Layer querysets ───────────────────────────────────────────────────────────
+
+def project_deadlines(start, end, scope: CalendarScope):
+    return ConstructionObject.objects.filter(
+        scope.projects_q(), deadline__gte=start, deadline__lte=end,
+    )
+
+
+def inspections(start, end, scope: CalendarScope):
+    return Review.objects.filter(
+        scope.reviews_q(), planned_date__gte=start, planned_date__lte=end,
+    )
+
+
+def issue_resolves(start, end, scope: CalendarScope):
+    return Issue.objects.filter(
+        scope.issues_q(),
+        resolve_date__gte=start,
+        resolve_date__lte=end,
+        status__in=OPEN_ISSUE_STATUSES,
+    )
+
+
+# ─── Events ────────────────────────────────────────────────────────────────────
+
+def _project_events(start, end, scope):
+    rows = project_deadlines(start, end, scope).values('id', 'name', 'deadline', 'status', 'created_at')
+    for row in rows:
+        yield {
+            'id': row['id'],
+            'title': row['name'],
+            'start': row['deadline'].isoformat(),
+            'end': (row['deadline'] + timedelta(hours=1)).isoformat(),
+            'type': PROJECT_DEADLINE,
+            'status': row['status'],
+            'project_name': row['name'],
+            'color': '#FF6B6B',
+            'extendedProps': {
+                'project_id': row['id'],
+                'start_date': row['created_at'].isoformat() if row['created_at'] else None,
+            }
+        }
+
+
+INSPECTION_VALUES = ('id', 'name', 'planned_date', 'status', 'description', 'object_id')
+INSPECTION_EXPRESSIONS = {
+    'project_name': F('object__name'),
+    'inspector': F('assigned_to__username'),
+}
+
+
+def _inspection_event(row) -> dict:
+    return {
+        'id': row['id'],
+        'title': row['name'],
+        'start': row['planned_date'].isoformat(),
+        'end': (row['planned_date'] + timedelta(hours=2)).isoformat(),
+        'type': INSPECTION,
+        'status': row['status'],
+        'project_name': row['project_name'],
+        'color': '#4ECDC4',
+        'extendedProps': {
+            'inspection_id': row['id'],
+            'project_id': row['object_id'],
+            'inspector': row['inspector'],
+            'description': row['description']
+        }
+    }
+
+
+def _inspection_events(start, end, scope):
+    rows = inspections(start, end, scope).values(*INSPECTION_VALUES, **INSPECTION_EXPRESSIONS)
+    return map(_inspection_event, rows)
+
+
+def _issue_events(start, end, scope):
+    rows = issue_resolves(start, end, scope).values(
+        'id', 'title', 'resolve_date', 'status', 'issue_level', 'description',
+        project_id=Coalesce('review__object_id', 'object_id'),
+        project_name=Coalesce('review__object__name', 'object__name'),
+        assigned_to=F('review__assigned_to__username'),
+    )
+    for row in rows:
+        yield {
+            'id': row['id'],
+            'title': row['title'],
+            'start': row['resolve_date'].isoformat(),
+            'end': (row['resolve_date'] + timedelta(hours=1)).isoformat(),
+            'type': ISSUE_RESOLVE,
+            'status': row['status'],
+            'priority': row['issue_level'],
+            'project_name': row['project_name'],
+            'color': PRIORITY_COLORS.get(row['issue_level'], '#FFD93D'),
+            'extendedProps': {
+                'issue_id': row['id'],
+                'project_id': row['project_id'],
+                'assigned_to': row['assigned_to'],
+                'description': row['description']
+            }
+        }
+
+
+_LAYERS = {
+    PROJECT_DEADLINE: _project_events,
+    INSPECTION: _inspection_events,
+    ISSUE_RESOLVE: _issue_events,
+}
+
+
+def build_events(start, end, types=EVENT_TYPES, scope: "CalendarScope | None" = None) -> list[dict]:
+    """Events of the requested layers in [start, end], one query per layer."""
+    scope = scope or CalendarScope()
+    events = []
+    for event_type in EVENT_TYPES:
+        if event_type in types:
+            events.extend(_LAYERS[event_type](start, end, scope))
+    return events
+
+
+# ─── Summary ───────────────────────────────────────────────────────────────────
+#
+# Per-day counts by layer and status for month / heatmap views, one grouped
+# query per layer:
+#   {"2026-10-01": {"inspection": {"planned": 3, "completed": 1}, ...}, ...}
+
+def _grouped_counts(queryset, day):
+    return (
+        queryset.annotate(day=day)
+        .values('day', 'status')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+
+
+_SUMMARY_LAYERS = {
+    PROJECT_DEADLINE: lambda start, end, scope: _grouped_counts(project_deadlines(start, end, scope), F('deadline')),
+    INSPECTION: lambda start, end, scope: _grouped_counts(inspections(start, end, scope), TruncDate('planned_date')),
+    ISSUE_RESOLVE: lambda start, end, scope: _grouped_counts(issue_resolves(start, end, scope), TruncDate('resolve_date')),
+}
+
+
+def build_summary(start, end, types=EVENT_TYPES, scope: "CalendarScope | None" = None) -> dict:
+    """Per-day event counts by type and status in [start, end]."""
+    scope = scope or CalendarScope()
+    days = {}
+    for event_type in EVENT_TYPES:
+        if event_type not in types:
+            continue
+        for row in _SUMMARY_LAYERS[event_type](start, end, scope):
+            by_status = days.setdefault(row['day'].isoformat(), {}).setdefault(event_type, {})
+            by_status[str(row['status'])] = row['count']
+    return dict(sorted(days.items()))
+
+
+# ─── Personal feed ─────────────────────────────────────────────────────────────
+#
+# Reviews and assignment deadlines assigned to one user, for polling clients
+# and calendar apps.  The sync token is the (max updated_at, row count) of
+# both sets: any edit bumps updated_at, a deletion or reassignment lowers the
+# count, so an unchanged token means an unchanged feed (→ 304).  Edits made
+# with QuerySet.update() bypass auto_now and are not seen.
+#
+# With a previous token the feed only carries rows updated since then, plus
+# the ids of every row still in the feed so clients can drop the others.
+
+ASSIGNMENT_DEADLINE = 'assignment_deadline'
+FEED_PAST_DAYS = 30
+
+
+def feed_reviews(user, now=None):
+    now = now or timezone.now()
+    return Review.objects.filter(
+        assigned_to=user, planned_date__gte=now - timedelta(days=FEED_PAST_DAYS),
+    )
+
+
+def feed_assignments(user, now=None):
+    now = now or timezone.now()
+    return Assignment.objects.filter(
+        assigned_to=user, deadline__gte=now - timedelta(days=FEED_PAST_DAYS),
+    )
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _set_state(queryset) -> tuple[int, int]:
+    state = queryset.order_by().aggregate(last=Max('updated_at'), count=Count('pk'))
+    last = state['last']
+    return ((last - EPOCH) // MICROSECOND if last else 0), state['count']
+
+
+class SyncToken:
+    """`<reviews us>.<reviews count>.<assignments us>.<assignments count>`"""
+
+    def __init__(self, reviews: tuple[int, int], assignments: tuple[int, int]):
+        self.reviews = reviews
+        self.assignments = assignments
+
+    @classmethod
+    def current(cls, reviews, assignments) -> "SyncToken":
+        return cls(_set_state(reviews), _set_state(assignments))
+
+    @classmethod
+    def parse(cls, value: str) -> "SyncToken":
+        try:
+            r_last, r_count, a_last, a_count = (int(part) for part in value.split('.'))
+        except ValueError:
+            raise CalendarQueryError('Invalid sync token')
+        return cls((r_last, r_count), (a_last, a_count))
+
+    def __str__(self):
+        return '.'.join(str(part) for part in (*self.reviews, *self.assignments))
+
+    def __eq__(self, other):
+        return isinstance(other, SyncToken) and str(self) == str(other)
+
+    @staticmethod
+    def since(state: tuple[int, int]) -> datetime:
+        return EPOCH + state[0] * MICROSECOND
+
+
+def _feed_review_event(row) -> dict:
+    event = _inspection_event(row)
+    event['uid'] = f"review-{row['id']}"
+    event['updated_at'] = row['updated_at'].isoformat()
+    return event
+
+
+def _feed_assignment_event(row) -> dict:
+    return {
+        'id': row['id'],
+        'uid': f"assignment-{row['id']}",
+        'title': row['title'],
+        'start': row['deadline'].isoformat(),
+        'end': (row['deadline'] + timedelta(hours=1)).isoformat(),
+        'type': ASSIGNMENT_DEADLINE,
+        'status': row['status'],
+        'project_name': row['project_name'],
+        'color': '#9B59B6',
+        'updated_at': row['updated_at'].isoformat(),
+        'extendedProps': {
+            'assignment_id': row['id'],
+            'project_id': row['object_id'],
+            'description': row['description'],
+        }
+    }
+
+
+def build_feed(user, token: SyncToken, since: "SyncToken | None" = None, now=None) -> dict:
+    """
+    Feed for `user` at `token` (see SyncToken.current).  With `since`, only
+    rows updated after it are listed and `ids` holds the full membership.
+    """
+    reviews = feed_reviews(user, now)
+    assignments = feed_assignments(user, now)
+    feed = {'sync_token': str(token), 'full': since is None}
+
+    if since is not None:
+        feed['ids'] = {
+            INSPECTION: list(reviews.order_by('pk').values_list('pk', flat=True)),
+            ASSIGNMENT_DEADLINE: list(assignments.order_by('pk').values_list('pk', flat=True)),
+        }
+        reviews = reviews.filter(updated_at__gt=SyncToken.since(since.reviews))
+        assignments = assignments.filter(updated_at__gt=SyncToken.since(since.assignments))
+
+    review_rows = reviews.order_by('planned_date').values(*INSPECTION_VALUES, 'updated_at', **INSPECTION_EXPRESSIONS)
+    assignment_rows = assignments.order_by('deadline').values(
+        'id', 'title', 'deadline', 'status', 'description', 'object_id', 'updated_at',
+        project_name=F('object__name'),
+    )
+    feed['events'] = [
+        *map(_feed_review_event, review_rows),
+        *map(_feed_assignment_event, assignment_rows),
+    ]
+    return feed
@@ -0,0 +1,121 @@
+"""
+De-duplication of incoming issue reports (Issue from `report_issue`,
+PublicIssue from the public endpoint).
+
+A report duplicates an open report on the same object with the same issue
+level that was last reported within ISSUE_DEDUP_WINDOW_MINUTES and, when
+both carry reporter coordinates, lies within ISSUE_DEDUP_RADIUS meters.
+Instead of a new report the parent's `report_count` goes up and its
+`last_reported_at` moves forward, so the window slides while reports keep
+coming.  The duplicate's own content (reporter, text, coordinates) is kept
+as a row of IssueDuplicate / PublicIssueDuplicate linked to the parent.  Candidates come from the (object, issue_level, last_reported_at)
+index; the distance is refined in Python on the few rows found.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import geo
+from .models import Issue, IssueDuplicate, PublicIssue, PublicIssueDuplicate
+from .utils import haversine_distance
+
+# model -> (object foreign key, which reports are still open)
+OPEN_REPORTS = {
+    Issue: ('object', Q(status__in=('open', 'in_progress'))),
+    PublicIssue: ('construction', Q(resolve_date__isnull=True)),
+}
+# model -> where the content of its merged duplicates is kept
+DUPLICATE_MODELS = {
+    Issue: IssueDuplicate,
+    PublicIssue: PublicIssueDuplicate,
+}
+MAX_CANDIDATES = 20
+
+
+def dedup_window() -> timedelta:
+    return timedelta(minutes=getattr(settings, 'ISSUE_DEDUP_WINDOW_MINUTES', 60))
+
+
+def dedup_radius() -> float:
+    return getattr(settings, 'ISSUE_DEDUP_RADIUS', 50)
+
+
+def find_parent(model, object_id, issue_level, latitude=None, longitude=None, now=None) -> "int | None":
+    """Id of the open report the new one duplicates, the most recently reported first."""
+    window = dedup_window()
+    if object_id is None or window <= timedelta(0):
+        return None
+    now = now or timezone.now()
+    object_field, open_q = OPEN_REPORTS[model]
+    candidates = model.objects.filter(
+        open_q,
+        **{f'{object_field}_id': object_id},
+        issue_level=issue_level,
+        last_reported_at__gte=now - window,
+    )
+    located = latitude is not None and longitude is not None
+    radius = dedup_radius()
+    if located:
+        candidates = candidates.filter(
+            Q(latitude__isnull=True) | Q(**geo.bbox_q_kwargs(latitude, longitude, radius))
+        )
+
+    rows = candidates.values_list('id', 'latitude', 'longitude').order_by('-last_reported_at')[:MAX_CANDIDATES]
+    for pk, lat, lon in rows:
+        if located and lat is not None and lon is not None:
+            if haversine_distance(latitude, longitude, lat, lon) > radius:
+                continue
+        return pk
+    return None
+
+
+def merge_report(model, parent_id, values: dict, now=None):
+    """
+    Count one more report on `parent_id` (a single UPDATE, safe under
+    concurrency) and keep the duplicate's content from `values`.
+    """
+    now = now or timezone.now()
+    duplicate_model = DUPLICATE_MODELS[model]
+    content = {
+        field.name: values[field.name]
+        for field in duplicate_model._meta.concrete_fields
+        if field.name in values
+    }
+    with transaction.atomic():
+        model.objects.filter(pk=parent_id).update(
+            report_count=F('report_count') + 1,
+            last_reported_at=now,
+            updated_at=now,
+        )
+        duplicate_model.objects.create(issue_id=parent_id, reported_at=now, **content)
+    return model.objects.get(pk=parent_id)
+
+
+def ingest(model, values: dict, create=None, now=None) -> tuple:
+    """
+    Create the report from `values` (model field -> value) unless it is a
+    duplicate, in which case it is merged into the parent.  New reports are
+    made by `create(last_reported_at=...)`, e.g. a validated serializer's
+    `save`; by default straight from `values`.  Returns (report, created).
+    Two reports arriving at the very same moment may still both create a
+    parent; the next one merges into the newer.
+    """
+    now = now or timezone.now()
+    object_field, _ = OPEN_REPORTS[model]
+    obj = values.get(object_field)
+    parent_id = find_parent(
+        model,
+        getattr(obj, 'pk', obj),
+        values.get('issue_level') or model._meta.get_field('issue_level').default,
+        values.get('latitude'),
+        values.get('longitude'),
+        now=now,
+    )
+    if parent_id is not None:
+        return merge_report(model, parent_id, values, now=now), False
+    if create is None:
+        return model.objects.create(**values, last_reported_at=now), True
+    return create(last_reported_at=now), True
@@ -0,0 +1,242 @@
+"""
+values()-based fast path for read-only list endpoints.
+
+A ``ValuesPlan`` is compiled from a DRF serializer instance.  Instead of
+instantiating model objects and walking ``field.get_attribute`` for every
+row, the plan reads the needed columns with ``.values()``, resolves nested
+relations with one batched query per relation and assembles plain dicts.
+
+Every leaf value is still converted with the serializer's own
+``field.to_representation`` so the rendered JSON is byte-identical to the
+regular serializer output.  Anything the compiler cannot reproduce
+faithfully (SerializerMethodField, dotted sources, custom
+``to_representation`` overrides, model properties …) raises
+``UnsupportedSerializer`` and the caller falls back to the regular path.
+"""
+from collections import defaultdict
+
+from django.db import models
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.fields import Field, empty
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+
+PARENT_KEY = "_values_plan_parent"
+
+# Entry kinds.  Relation kinds (>= _FK) need a batched lookup per page.
+_VALUE, _CONST, _FILE, _PK, _FK, _REVERSE_ONE, _MANY = range(7)
+
+
+class UnsupportedSerializer(Exception):
+    """Raised when a serializer cannot be compiled into a values() plan."""
+
+
+def _model_field(meta, attr: str):
+    """Return the model field or reverse relation reachable as ``instance.<attr>``."""
+    for field in meta.get_fields():
+        if field.auto_created and not field.concrete and field.is_relation:
+            if field.get_accessor_name() == attr:
+                return field
+        elif field.name == attr:
+            return field
+    return None
+
+
+def _missing_entry(field):
+    """
+    Mirror ``Field.get_attribute`` for an attribute the instance does not
+    have: default → allow_null → SkipField.  Returns None for skipped fields.
+    """
+    if field.default is not empty:
+        value = field.get_default()
+        return _CONST, field.field_name, None, None if value is None else field.to_representation(value)
+    if field.allow_null:
+        return _CONST, field.field_name, None, None
+    if not field.required:
+        return None
+    raise UnsupportedSerializer(f"required field '{field.field_name}' has no source")
+
+
+class ValuesPlan:
+    """
+    Compiled representation of a serializer over a model.
+
+    ``columns`` are the names passed to ``.values()``; ``entries`` are
+    ``(kind, field_name, column, extra)`` tuples in serializer field order.
+    """
+
+    def __init__(self, serializer, model, annotations=()):
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise UnsupportedSerializer(f"{type(serializer).__name__} overrides to_representation")
+
+        self.model = model
+        self.pk_name = model._meta.pk.attname
+        self._columns = {self.pk_name: None}
+        self.entries = []
+
+        for field in serializer._readable_fields:
+            entry = self._compile_field(field, model, set(annotations))
+            if entry is not None:
+                self.entries.append(entry)
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._columns)
+
+    def _column(self, name: str) -> str:
+        self._columns[name] = None
+        return name
+
+    def _compile_field(self, field, model, annotations):
+        meta = model._meta
+        if field.source == "*" or len(field.source_attrs) != 1:
+            raise UnsupportedSerializer(f"field '{field.field_name}' has a composite source")
+
+        attr = field.source_attrs[0]
+        model_field = _model_field(meta, attr)
+
+        if model_field is None and attr not in annotations:
+            if hasattr(model, attr):
+                # property / method on the model: only an instance can answer
+                raise UnsupportedSerializer(f"'{attr}' is not a column of {meta.label}")
+            return _missing_entry(field)
+
+        if isinstance(field, serializers.ListSerializer):
+            if type(field).to_representation is not serializers.ListSerializer.to_representation:
+                raise UnsupportedSerializer(f"{type(field).__name__} overrides to_representation")
+            if model_field is None or not (model_field.many_to_many or model_field.one_to_many):
+                raise UnsupportedSerializer(f"'{attr}' is not a multi-valued relation")
+            child = ValuesPlan(field.child, model_field.related_model)
+            return self._many_entry(field, model_field, child)
+
+        if isinstance(field, ManyRelatedField):
+            if type(field.child_relation) is not PrimaryKeyRelatedField or field.child_relation.pk_field is not None:
+                raise UnsupportedSerializer(f"'{attr}' uses a non-pk related field")
+            if model_field is None or not (model_field.many_to_many or model_field.one_to_many):
+                raise UnsupportedSerializer(f"'{attr}' is not a multi-valued relation")
+            return self._many_entry(field, model_field, _PkPlan(model_field.related_model))
+
+        if isinstance(field, serializers.BaseSerializer):
+            if model_field is None or not model_field.is_relation:
+                raise UnsupportedSerializer(f"'{attr}' is not a relation")
+            child = ValuesPlan(field, model_field.related_model)
+            if model_field.concrete and (model_field.many_to_one or model_field.one_to_one):
+                return _FK, field.field_name, self._column(model_field.attname), child
+            if model_field.one_to_one:
+                return _REVERSE_ONE, field.field_name, self.pk_name, (child, model_field.field.name)
+            raise UnsupportedSerializer(f"'{attr}' is a multi-valued relation without many=True")
+
+        if isinstance(field, PrimaryKeyRelatedField):
+            if field.pk_field is not None or model_field is None or not model_field.concrete:
+                raise UnsupportedSerializer(f"'{attr}' is not a forward relation")
+            return _PK, field.field_name, self._column(model_field.attname), None
+
+        if isinstance(field, RelatedField) or type(field).get_attribute is not Field.get_attribute:
+            raise UnsupportedSerializer(f"{type(field).__name__} is not supported")
+
+        if model_field is None:
+            return _VALUE, field.field_name, self._column(attr), field.to_representation
+        if model_field.is_relation or not model_field.concrete:
+            raise UnsupportedSerializer(f"'{attr}' is a relation rendered as a plain field")
+        if isinstance(model_field, models.FileField):
+            return _FILE, field.field_name, self._column(model_field.attname), (field, model_field)
+        return _VALUE, field.field_name, self._column(model_field.attname), field.to_representation
+
+    def _many_entry(self, field, model_field, child):
+        if model_field.concrete:
+            # forward m2m: filter the child model back through the relation
+            lookup = model_field.related_query_name()
+        else:
+            # reverse fk / reverse m2m
+            lookup = model_field.field.name
+        return _MANY, field.field_name, self.pk_name, (child, lookup)
+
+    # ── evaluation ────────────────────────────────────────────────────────────
+
+    def values(self, queryset, **expressions):
+        return queryset.values(*self.columns, **expressions)
+
+    def _fetch_grouped(self, manager, lookup: str, keys: set) -> tuple[list, list]:
+        queryset = manager.filter(**{f"{lookup}__in": keys})
+        rows = list(self.values(queryset, **{PARENT_KEY: F(lookup)}))
+        return rows, self.serialize(rows)
+
+    def _batch(self, kind, column, extra, rows):
+        keys = {row[column] for row in rows}
+        keys.discard(None)
+        if not keys:
+            return {}
+
+        if kind == _FK:
+            child = extra
+            child_rows = list(child.values(child.model._base_manager.filter(pk__in=keys)))
+            return {row[child.pk_name]: data for row, data in zip(child_rows, child.serialize(child_rows))}
+
+        if kind == _REVERSE_ONE:
+            child, lookup = extra
+            child_rows, child_data = child._fetch_grouped(child.model._base_manager, lookup, keys)
+            return {row[PARENT_KEY]: data for row, data in zip(child_rows, child_data)}
+
+        child, lookup = extra
+        child_rows, child_data = child._fetch_grouped(child.model._default_manager, lookup, keys)
+        grouped = defaultdict(list)
+        for row, data in zip(child_rows, child_data):
+            grouped[row[PARENT_KEY]].append(data)
+        return grouped
+
+    @property
+    def field_names(self) -> list[str]:
+        return [name for _, name, _, _ in self.entries]
+
+    def serialize(self, rows) -> list:
+        """Turn ``.values()`` rows of this plan into serializer-shaped dicts."""
+        names = self.field_names
+        return [dict(zip(names, values)) for values in self.serialize_rows(rows)]
+
+    def serialize_rows(self, rows) -> list:
+        """Like ``serialize`` but each row is a list ordered as ``field_names``."""
+        rows = rows if isinstance(rows, list) else list(rows)
+        related = {
+            name: self._batch(kind, column, extra, rows)
+            for kind, name, column, extra in self.entries
+            if kind >= _FK
+        }
+
+        data = []
+        for row in rows:
+            item = []
+            for kind, name, column, extra in self.entries:
+                if kind == _VALUE:
+                    value = row[column]
+                    item.append(None if value is None else extra(value))
+                elif kind == _CONST:
+                    item.append(extra)
+                elif kind == _PK:
+                    item.append(row[column])
+                elif kind == _FILE:
+                    value = row[column]
+                    field, model_field = extra
+                    item.append(field.to_representation(model_field.attr_class(None, model_field, value)) if value else None)
+                elif kind == _FK:
+                    value = row[column]
+                    item.append(None if value is None else related[name].get(value))
+                elif kind == _MANY:
+                    item.append(related[name].get(row[column], []))
+                else:
+                    # DRF renders a missing reverse one-to-one as None
+                    item.append(related[name].get(row[column]))
+            data.append(item)
+        return data
+
+
+class _PkPlan(ValuesPlan):
+    """Plan for ``PrimaryKeyRelatedField(many=True)``: rows render as bare pks."""
+
+    def __init__(self, model):
+        self.model = model
+        self.pk_name = model._meta.pk.attname
+        self._columns = {self.pk_name: None}
+        self.entries = []
+
+    def serialize(self, rows) -> list:
+        return [row[self.pk_name] for row in rows]
@@ -16,9 +16,18 @@
 # ── Negation sentinel ──────────────────────────────────────────────────────────
 #   title__icontains=foo&title__icontains__exclude=1  →  .exclude(title__icontains="foo")
 
+import re
+import time
+
 import django_filters
-from django.db.models import Q
+from django.conf import settings
+from django.core.exceptions import (
+    FieldDoesNotExist, FieldError, ImproperlyConfigured, ValidationError as DjangoValidationError,
+)
+from django.db import connections, router
+from django.db.models import Exists, Field, OuterRef, Q
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import ValidationError
 from api.models import ConstructionObject
 
 
@@ -35,7 +44,10 @@ def _get_lookup_pairs(data: dict, prefix: str = "") -> list[tuple[str, str]]:
     Excludes meta keys (filter_logic, g{n}_logic, page, ordering …) and
     __exclude sentinels.
     """
-    META = {"filter_logic", "page", "limit", "sort", "dir", "ordering", "search"}
+    META = {
+        "filter_logic", "page", "page_size", "limit", "sort", "dir", "ordering", "search", "format", "dictionary",
+        "pagination", "cursor", "count",
+    }
     pairs = []
     for key, value in data.items():
         if key in META:
@@ -49,15 +61,383 @@ def _get_lookup_pairs(data: dict, prefix: str = "") -> list[tuple[str, str]]:
     return pairs
 
 
-def _build_q(lookup_expr: str, value: str, exclude: bool) -> Q:
-    """Build a single Q object, handling __in, __isnull, and plain lookups."""
+# ─── Lookup resolution ─────────────────────────────────────────────────────────
+#
+# Every lookup string is resolved per model against the model's fields,
+# transforms and lookups:
+#   unknown first segment    → None (not a filter, e.g. a view-specific param)
+#   invalid path / operator  → InvalidLookup (400)
+#   valid                    → ResolvedLookup
+# Resolutions are cached (up to LOOKUP_CACHE_SIZE entries), failures are not:
+# clients choose the lookup strings, invalid ones must not fill the cache.
+#
+# Lookups that cross a multi-valued relation (m2m, reverse FK) are applied as
+# an EXISTS semi-join on the related model instead of a JOIN, so they never
+# multiply the rows of the outer (possibly aggregated) queryset.
+
+class InvalidLookup(Exception):
+    pass
+
+
+class ResolvedLookup:
+    """
+    A validated lookup.  For multi-valued paths `outer_ref` / `related_model`
+    / `back_lookup` / `inner_lookup` describe the EXISTS subquery:
+
+        Exists(related_model.objects.filter(
+            **{back_lookup: OuterRef(outer_ref), inner_lookup: value}))
+
+    `isnull=True` (and `=None`) follows Django's LEFT JOIN instead: rows without related
+    objects match too, so it becomes `~Exists(all related) | Exists(…)`,
+    just `~Exists(all related)` on the relation itself.
+
+    `field` / `operator` are the last model field on the path and the final
+    lookup name, used by the cost check.  Both are None for annotations.
+    """
+    __slots__ = (
+        "lookup_expr", "related_model", "back_lookup", "outer_ref", "inner_lookup",
+        "field", "operator",
+    )
+
+    def __init__(self, lookup_expr, related_model=None, back_lookup=None, outer_ref=None, inner_lookup=None,
+                 field=None, operator=None):
+        self.lookup_expr = lookup_expr
+        self.related_model = related_model
+        self.back_lookup = back_lookup
+        self.outer_ref = outer_ref
+        self.inner_lookup = inner_lookup
+        self.field = field
+        self.operator = operator
+
+    @property
+    def multi_valued(self) -> bool:
+        return self.related_model is not None
+
+    def build_q(self, value, exclude: bool) -> Q:
+        if self.multi_valued:
+            related = self.related_model._default_manager.filter(**{self.back_lookup: OuterRef(self.outer_ref)})
+            if self.operator == "isnull":
+                matches_missing = value is True
+            else:
+                matches_missing = self.operator == "exact" and value is None
+            if matches_missing:
+                q = ~Q(Exists(related))
+                if self.inner_lookup not in ("pk", "pk__isnull"):
+                    q |= Q(Exists(related.filter(**{self.inner_lookup: value})))
+            else:
+                subquery = self.related_model._default_manager.filter(
+                    **{self.back_lookup: OuterRef(self.outer_ref), self.inner_lookup: value}
+                )
+                q = Q(Exists(subquery))
+        else:
+            q = Q(**{self.lookup_expr: value})
+        return ~q if exclude else q
+
+
+LOOKUP_CACHE_SIZE = 1024
+
+_LOOKUP_CACHE: dict = {}
+
+
+def _get_field(opts, name: str):
+    if name == "pk":
+        return opts.pk
+    return opts.get_field(name)
+
+
+def _validate_operators(field, parts: list[str], lookup_expr: str):
+    """Check trailing transforms / lookup against the final field."""
+    output_field = field
+    for i, part in enumerate(parts):
+        if i == len(parts) - 1 and output_field.get_lookup(part) is not None:
+            return
+        get_transform = getattr(output_field, "get_transform", None)
+        transform = get_transform(part) if get_transform else None
+        if transform is None:
+            raise InvalidLookup(f"Unsupported lookup '{part}' in '{lookup_expr}'")
+        # Transforms with a static output field (Extract*, Trunc*) change
+        # the lookups available after them; others keep the source field.
+        transform_field = getattr(transform, "output_field", None)
+        if isinstance(transform_field, Field):
+            output_field = transform_field
+
+
+def _compile_lookup(model, lookup_expr: str):
+    parts = lookup_expr.split("__")
+    opts = model._meta
+    try:
+        _get_field(opts, parts[0])
+    except FieldDoesNotExist:
+        return None
+
+    fields = []
+    for part in parts:
+        try:
+            field = _get_field(opts, part)
+        except FieldDoesNotExist:
+            break
+        fields.append(field)
+        if not field.is_relation:
+            break
+        opts = field.related_model._meta
+
+    operators = parts[len(fields):]
+    if operators:
+        _validate_operators(fields[-1], operators, lookup_expr)
+    field, operator = fields[-1], operators[-1] if operators else "exact"
+
+    multi_at = next((i for i, f in enumerate(fields) if f.many_to_many or f.one_to_many), None)
+    if multi_at is None:
+        return ResolvedLookup(lookup_expr, field=field, operator=operator)
+
+    relation = fields[multi_at]
+    # Name of the relation seen from the related model back to its parent.
+    back_lookup = relation.related_query_name() if relation.concrete else relation.field.name
+    outer_ref = "__".join(parts[:multi_at]) or "pk"
+    inner = parts[multi_at + 1:]
+    if multi_at + 1 >= len(fields):
+        inner = ["pk"] + inner
+    return ResolvedLookup(
+        lookup_expr,
+        related_model=relation.related_model,
+        back_lookup=back_lookup,
+        outer_ref=outer_ref,
+        inner_lookup="__".join(inner),
+        field=field,
+        operator=operator,
+    )
+
+
+def resolve_lookup(model, lookup_expr: str) -> "ResolvedLookup | None":
+    """Cached, per-model resolution of `lookup_expr` (see module notes)."""
+    key = (model, lookup_expr)
+    try:
+        return _LOOKUP_CACHE[key]
+    except KeyError:
+        pass
+    resolved = _compile_lookup(model, lookup_expr)
+    if len(_LOOKUP_CACHE) >= LOOKUP_CACHE_SIZE:
+        _LOOKUP_CACHE.clear()
+    _LOOKUP_CACHE[key] = resolved
+    return resolved
+
+
+# ─── Allowed-lookup registry ───────────────────────────────────────────────────
+#
+# A view (`filter_lookups` attribute) or a model (`register_filter_lookups`)
+# can whitelist the filter paths and operators it accepts:
+#
+#   filter_lookups = {
+#       "status":                 ["exact", "in"],
+#       "neighborhood__district": ["exact", "in"],
+#       "deadline":               ["gte", "lte", "year__gte"],
+#       "financed":               ["gte", "lte"],      # annotation
+#   }
+#
+# The whitelist is resolved once into ResolvedLookups; a filter on a model
+# field or annotation that is not listed is rejected with a 400.  Filtering
+# is denied by default: a view without either whitelist accepts only its
+# `filterset_fields`, with `exact` and `in`.  Text pattern lookups on large
+# tables also need a supporting index (see below).
+
+_MODEL_LOOKUPS: dict = {}
+_REGISTRY_CACHE: dict = {}
+
+
+def register_filter_lookups(model, lookups: dict):
+    """Default whitelist for every view filtering `model` without its own."""
+    _MODEL_LOOKUPS[model] = lookups
+    _REGISTRY_CACHE.clear()
+    _PLAN_CACHE.clear()
+
+
+class FilterRegistry:
+    """Precompiled whitelist: lookup string → ResolvedLookup."""
+
+    def __init__(self, model, lookups: dict):
+        self.model = model
+        self.allowed = {}
+        for path, operators in lookups.items():
+            for operator in operators:
+                lookup_expr = path if operator == "exact" else f"{path}__{operator}"
+                try:
+                    resolved = resolve_lookup(model, lookup_expr)
+                except InvalidLookup as exc:
+                    raise ImproperlyConfigured(f"{model.__name__} filter_lookups: {exc}")
+                # not a model field: an annotation the view adds to its queryset
+                self.allowed[lookup_expr] = resolved or ResolvedLookup(lookup_expr)
+
+    def resolve(self, queryset, lookup_expr: str) -> "ResolvedLookup | None":
+        try:
+            return self.allowed[lookup_expr]
+        except KeyError:
+            pass
+        name = lookup_expr.split("__", 1)[0]
+        if name in queryset.query.annotations or resolve_lookup(self.model, lookup_expr) is not None:
+            raise InvalidLookup(f"Filtering on '{lookup_expr}' is not allowed")
+        return None
+
+
+def default_filter_lookups(view) -> dict:
+    """Whitelist of a view without `filter_lookups`: its `filterset_fields`."""
+    fields = getattr(view, "filterset_fields", None) or ()
+    if isinstance(fields, dict):
+        return {path: list(operators) for path, operators in fields.items()}
+    return {path: ["exact", "in"] for path in fields}
+
+
+def get_filter_registry(view, model) -> FilterRegistry:
+    view_class = type(view) if view is not None else None
+    key = (view_class, model)
+    try:
+        return _REGISTRY_CACHE[key]
+    except KeyError:
+        pass
+    lookups = getattr(view, "filter_lookups", None)
+    if lookups is None:
+        lookups = _MODEL_LOOKUPS.get(model)
+    if lookups is None:
+        lookups = default_filter_lookups(view)
+    registry = FilterRegistry(model, lookups)
+    _REGISTRY_CACHE[key] = registry
+    return registry
+
+
+# ─── Cost check for unrestricted lookups ───────────────────────────────────────
+#
+# Pattern lookups compile to LIKE '%…%' / UPPER(…) LIKE / regex, which a plain
+# btree index cannot serve.  On tables above FILTER_LARGE_TABLE_ROWS (planner
+# estimate) they are only accepted when the field has a trigram index;
+# `startswith` is accepted with any index on the field.
+
+PATTERN_LOOKUPS = {"contains", "icontains", "endswith", "iendswith", "istartswith", "iexact", "regex", "iregex"}
+PREFIX_LOOKUPS = {"startswith"}
+TABLE_ROWS_TTL = 600
+
+_TABLE_ROWS: dict = {}
+
+
+def _estimated_rows(model) -> "int | None":
+    """pg_class.reltuples for the model's table, cached for TABLE_ROWS_TTL."""
+    table = model._meta.db_table
+    cached = _TABLE_ROWS.get(table)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    connection = connections[router.db_for_read(model)]
+    rows = None
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table])
+            result = cursor.fetchone()
+        rows = result[0] if result else None
+    _TABLE_ROWS[table] = (rows, time.monotonic() + TABLE_ROWS_TTL)
+    return rows
+
+
+def _has_index(field, trigram: bool) -> bool:
+    if not trigram and (field.db_index or field.unique or field.primary_key):
+        return True
+    for index in field.model._meta.indexes:
+        if field.name not in index.fields:
+            continue
+        if not trigram and index.fields[0] == field.name:
+            return True
+        opclasses = getattr(index, "opclasses", ())
+        if trigram and any("trgm" in opclass for opclass in opclasses):
+            return True
+    return False
+
+
+def _needs_index(resolved: ResolvedLookup) -> bool:
+    """True for a pattern / prefix lookup without an index that can serve it."""
+    field, operator = resolved.field, resolved.operator
+    if field is None or field.is_relation:
+        return False
+    trigram = operator in PATTERN_LOOKUPS
+    if not trigram and operator not in PREFIX_LOOKUPS:
+        return False
+    return not _has_index(field, trigram)
+
+
+def _check_cost(resolved: ResolvedLookup):
+    """Reject an unindexed pattern lookup (see `_needs_index`) on a large table."""
+    field = resolved.field
+    rows = _estimated_rows(field.model)
+    limit = getattr(settings, "FILTER_LARGE_TABLE_ROWS", 100_000)
+    if rows is not None and rows > limit:
+        raise InvalidLookup(
+            f"Lookup '{resolved.lookup_expr}' is not allowed: "
+            f"'{field.name}' is not indexed for '{resolved.operator}' on a large table"
+        )
+
+
+def _parse_value(lookup_expr: str, value: str):
     if lookup_expr.endswith("__in"):
-        q = Q(**{lookup_expr: _parse_in_value(value)})
-    elif lookup_expr.endswith("__isnull"):
-        q = Q(**{lookup_expr: value == "True"})
-    else:
-        q = Q(**{lookup_expr: value})
-    return ~q if exclude else q
+        return _parse_in_value(value)
+    if lookup_expr.endswith("__isnull"):
+        return value == "True"
+    return value
+
+
+def _combine(qs: list[Q], logic: str) -> Q:
+    combined = qs[0]
+    for q in qs[1:]:
+        combined = combined | q if logic == "OR" else combined & q
+    return combined
+
+
+# ─── Filter plans ──────────────────────────────────────────────────────────────
+#
+# A FilterPlan is the parsed shape of a request's filter params: groups of
+# (param key, ResolvedLookup, exclude) with their AND/OR logic, without the
+# values.  Plans are cached by a signature of the param names, sentinels and
+# logic params, so repeated requests that only change values skip parsing
+# and resolution.
+
+PLAN_CACHE_SIZE = 1024
+_GROUP_LOGIC_RE = re.compile(r"^g\d+_logic$")
+
+_PLAN_CACHE: dict = {}
+
+
+class FilterPlan:
+    """
+    `guarded` holds the unindexed pattern lookups of the plan; the table size
+    behind them can change, so they are re-checked on every request.
+    """
+    __slots__ = ("logic", "groups", "guarded")
+
+    def __init__(self, logic: str, groups: list):
+        self.logic = logic
+        self.groups = groups
+        self.guarded = [
+            resolved for _, rules in groups for _, resolved, _ in rules
+            if _needs_index(resolved)
+        ]
+
+    def build_q(self, data) -> "Q | None":
+        for resolved in self.guarded:
+            _check_cost(resolved)
+        group_qs = []
+        for logic, rules in self.groups:
+            rule_qs = [
+                resolved.build_q(_parse_value(resolved.lookup_expr, data.get(key)), exclude)
+                for key, resolved, exclude in rules
+            ]
+            if rule_qs:
+                group_qs.append(_combine(rule_qs, logic))
+        return _combine(group_qs, self.logic) if group_qs else None
+
+
+def _plan_signature(data) -> tuple:
+    signature = []
+    for key in sorted(data.keys()):
+        if key == "filter_logic" or key.endswith("__exclude") or _GROUP_LOGIC_RE.match(key):
+            signature.append((key, data.get(key)))
+        else:
+            signature.append((key, None))
+    return tuple(signature)
 
 
 # ─── Universal group-aware filter backend ─────────────────────────────────────
@@ -68,67 +448,77 @@ class UniversalDRFFilterBackend(DjangoFilterBackend):
       - flat single-group params (standard FilterSet passthrough)
       - multi-group g{n}__ prefixed params with AND/OR logic
       - __exclude=1 negation sentinels
+
+    All rules are combined into one Q and applied with a single .filter()
+    call; rules across multi-valued relations become EXISTS subqueries.
+    Params that are not fields of the model are ignored, invalid lookups
+    and values are rejected with a 400.  Lookups are restricted by the
+    view's / model's whitelist, or its `filterset_fields` (see above);
+    parsed plans are cached per view and param signature.  Params the view reads
+    itself are listed in its `filter_ignore_params`.
     """
 
     def filter_queryset(self, request, queryset, view):
         data = request.query_params
 
+        try:
+            final_q = self.build_filter_q(data, queryset, view)
+            if final_q is not None:
+                queryset = queryset.filter(final_q)
+        except InvalidLookup as exc:
+            raise ValidationError({"filters": [str(exc)]})
+        except (FieldError, DjangoValidationError, ValueError, TypeError) as exc:
+            messages = exc.messages if isinstance(exc, DjangoValidationError) else [str(exc)]
+            raise ValidationError({"filters": messages})
+
+        return queryset
+
+    def build_filter_q(self, data, queryset, view=None) -> "Q | None":
+        return self.get_filter_plan(data, queryset, view).build_q(data)
+
+    def get_filter_plan(self, data, queryset, view=None) -> FilterPlan:
+        registry = get_filter_registry(view, queryset.model)
+        key = (
+            type(view) if view is not None else None,
+            queryset.model,
+            frozenset(queryset.query.annotations),
+            _plan_signature(data),
+        )
+        plan = _PLAN_CACHE.get(key)
+        if plan is None:
+            ignore = frozenset(getattr(view, "filter_ignore_params", ()))
+            plan = self.compile_plan(data, queryset, registry, ignore)
+            if len(_PLAN_CACHE) >= PLAN_CACHE_SIZE:
+                _PLAN_CACHE.clear()
+            _PLAN_CACHE[key] = plan
+        return plan
+
+    def compile_plan(self, data, queryset, registry, ignore=frozenset()) -> FilterPlan:
         # ── Multi-group mode ──────────────────────────────────────────────────
         if "filter_logic" in data:
-            top_logic = data.get("filter_logic", "AND").upper()
-            group_qs = []
-
+            groups = []
             gi = 0
             while f"g{gi}_logic" in data:
-                group_logic = data.get(f"g{gi}_logic", "AND").upper()
                 prefix = f"g{gi}__"
-                pairs = _get_lookup_pairs(data, prefix=prefix)
-
-                rule_qs = []
-                for lookup_expr, value in pairs:
-                    sentinel_key = f"{prefix}{lookup_expr}__exclude"
-                    exclude = data.get(sentinel_key) == "1"
-                    rule_qs.append(_build_q(lookup_expr, value, exclude))
-
-                if rule_qs:
-                    if group_logic == "OR":
-                        combined = rule_qs[0]
-                        for q in rule_qs[1:]:
-                            combined |= q
-                    else:
-                        combined = rule_qs[0]
-                        for q in rule_qs[1:]:
-                            combined &= q
-                    group_qs.append(combined)
-
+                rules = self._compile_rules(data, queryset, registry, ignore, prefix)
+                groups.append((data.get(f"g{gi}_logic", "AND").upper(), rules))
                 gi += 1
+            return FilterPlan(data.get("filter_logic", "AND").upper(), groups)
 
-            if group_qs:
-                if top_logic == "OR":
-                    final_q = group_qs[0]
-                    for q in group_qs[1:]:
-                        final_q |= q
-                else:
-                    final_q = group_qs[0]
-                    for q in group_qs[1:]:
-                        final_q &= q
-                queryset = queryset.filter(final_q)
+        # ── Flat single-group mode ────────────────────────────────────────────
+        return FilterPlan("AND", [("AND", self._compile_rules(data, queryset, registry, ignore))])
 
-            return queryset
-
-        # ── Flat single-group mode (standard FilterSet) ───────────────────────
-        pairs = _get_lookup_pairs(data)
-        for lookup_expr, value in pairs:
-            sentinel_key = f"{lookup_expr}__exclude"
-            exclude = data.get(sentinel_key) == "1"
-            try:
-                q = _build_q(lookup_expr, value, exclude)
-                queryset = queryset.filter(q)
-            except Exception:
-                # Unknown lookup — skip gracefully
+    def _compile_rules(self, data, queryset, registry, ignore=frozenset(), prefix: str = "") -> list:
+        rules = []
+        for lookup_expr, _ in _get_lookup_pairs(data, prefix=prefix):
+            if f"{prefix}{lookup_expr}" in ignore:
                 continue
-
-        return queryset
+            resolved = registry.resolve(queryset, lookup_expr)
+            if resolved is None:
+                continue
+            exclude = data.get(f"{prefix}{lookup_expr}__exclude") == "1"
+            rules.append((f"{prefix}{lookup_expr}", resolved, exclude))
+        return rules
 
 
 # ─── Example typed FilterSet (optional — for OpenAPI schema generation) ────────
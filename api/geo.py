@@ -0,0 +1,61 @@
+"""
+Spatial helpers over ConstructionObject.latitude / longitude / radius.
+
+Queries over many rows (ReviewListView, the dedup of issue reports) narrow
+them with a bounding-box range query on the (latitude, longitude) index,
+then compute the exact haversine distance of the few rows left.  Geofence
+checks of one known object (`is_inside`) need no query at all.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+from .utils import haversine_distance
+
+EARTH_RADIUS = 6371000  # meters
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+
+def bounding_box(latitude: float, longitude: float, radius: float) -> tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lon, max_lon) enclosing the circle of `radius` meters."""
+    delta_lat = radius / METERS_PER_DEGREE
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6 or abs(latitude) + delta_lat >= 90:
+        return max(latitude - delta_lat, -90.0), min(latitude + delta_lat, 90.0), -180.0, 180.0
+    delta_lon = min(radius / (METERS_PER_DEGREE * cos_lat), 180.0)
+    return latitude - delta_lat, latitude + delta_lat, longitude - delta_lon, longitude + delta_lon
+
+
+def bbox_q_kwargs(latitude: float, longitude: float, radius: float, prefix: str = "") -> dict:
+    """Range lookups for `bounding_box`, e.g. prefix="object__" for related rows."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius)
+    return {
+        f"{prefix}latitude__range": (min_lat, max_lat),
+        f"{prefix}longitude__range": (min_lon, max_lon),
+    }
+
+
+def haversine_expression(latitude: float, longitude: float, lat_field: str = "latitude",
+                         lon_field: str = "longitude"):
+    """Database-side distance in meters from the point to `lat_field` / `lon_field`."""
+    lat = Radians(F(lat_field))
+    half_dlat = (lat - Value(math.radians(latitude))) / 2
+    half_dlon = (Radians(F(lon_field)) - Value(math.radians(longitude))) / 2
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(math.radians(latitude))) * Cos(lat) * Power(Sin(half_dlon), 2)
+    # rounding can push sqrt(a) marginally above 1, outside asin's domain
+    return Value(2.0 * EARTH_RADIUS) * ASin(Least(Sqrt(a), Value(1.0)), output_field=FloatField())
+
+
+def geofence_enabled() -> bool:
+    return getattr(settings, "GEOFENCE_ENABLED", True)
+
+
+def distance_to(obj, latitude: float, longitude: float) -> float:
+    return haversine_distance(latitude, longitude, obj.latitude, obj.longitude)
+
+
+def is_inside(obj, latitude: float, longitude: float) -> bool:
+    """Whether the point lies inside the object's geofence."""
+    return distance_to(obj, latitude, longitude) <= obj.radius
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import User
+from api.renderers import ORJSONRenderer
+from api.views import CalendarViewSet, ConstructionsView
+
+ENDPOINTS = {
+    'objects': ('/api/objects/', ConstructionsView, 'list'),
+    'calendar': ('/api/calendar/events/', CalendarViewSet, 'events'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare the stdlib JSONRenderer with ORJSONRenderer on real API payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('endpoints', nargs='*', default=list(ENDPOINTS), help='endpoints to benchmark')
+        parser.add_argument('--username', help='user to run requests as (default: first superuser)')
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--start', help='calendar range start (ISO date, range of at most 93 days)')
+        parser.add_argument('--end', help='calendar range end (ISO date)')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['username'])
+        factory = APIRequestFactory()
+        params = {
+            'page_size': options['page_size'],
+            'start': options['start'],
+            'end': options['end'],
+        }
+        params = {k: v for k, v in params.items() if v is not None}
+        failed = False
+
+        for name in options['endpoints']:
+            if name not in ENDPOINTS:
+                raise CommandError(f'Unknown endpoint {name}, choose from {", ".join(ENDPOINTS)}')
+            path, view_class, action = ENDPOINTS[name]
+
+            request = factory.get(path, params)
+            force_authenticate(request, user=user)
+            data = view_class.as_view({'get': action})(request).data
+
+            results = {}
+            for renderer in (JSONRenderer(), ORJSONRenderer()):
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    content = renderer.render(data, 'application/json')
+                    timings.append(time.perf_counter() - started)
+                results[type(renderer).__name__] = (min(timings), content)
+
+            (std_time, std_content), (fast_time, fast_content) = results.values()
+            identical = std_content == fast_content
+            failed = failed or not identical
+            self.stdout.write(
+                f"{name}: {len(std_content)} bytes, "
+                f"json {std_time * 1000:.2f} ms, orjson {fast_time * 1000:.2f} ms, "
+                f"speedup x{std_time / fast_time:.2f}"
+            )
+            if identical:
+                self.stdout.write(self.style.SUCCESS(f"{name}: output identical"))
+            else:
+                self.stdout.write(self.style.ERROR(f"{name}: output differs"))
+
+        if failed:
+            raise CommandError('ORJSONRenderer output differs from JSONRenderer')
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User {username} not found')
+        user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('No superuser found, pass --username')
+        return user
@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import User
+from api.views import ConstructionsView, InspectionsView, IssuesView
+
+ENDPOINTS = {
+    'objects': ('/api/objects/', ConstructionsView),
+    'issues': ('/api/issues/', IssuesView),
+    'inspections': ('/api/inspections/', InspectionsView),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare the values() fast path with the regular serializers on list endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('endpoints', nargs='*', default=list(ENDPOINTS), help='endpoints to benchmark')
+        parser.add_argument('--username', help='user to run requests as (default: first superuser)')
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--ordering', default='id',
+            help='ordering param; grouped querysets are otherwise unordered and not comparable',
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['username'])
+        factory = APIRequestFactory()
+        failed = False
+
+        for name in options['endpoints']:
+            if name not in ENDPOINTS:
+                raise CommandError(f'Unknown endpoint {name}, choose from {", ".join(ENDPOINTS)}')
+            path, view_class = ENDPOINTS[name]
+
+            results = {}
+            for label, enabled in (('serializer', False), ('values', True)):
+                view = view_class.as_view({'get': 'list'}, values_list_enabled=enabled)
+                timings = []
+                for _ in range(options['repeat']):
+                    request = factory.get(path, {'page_size': options['page_size'], 'ordering': options['ordering']})
+                    force_authenticate(request, user=user)
+                    started = time.perf_counter()
+                    response = view(request)
+                    response.render()
+                    timings.append(time.perf_counter() - started)
+                results[label] = (min(timings), response.content, len(response.data.get('results', [])))
+
+            slow, fast = results['serializer'], results['values']
+            rows = max(slow[2], 1)
+            identical = slow[1] == fast[1]
+            failed = failed or not identical
+            self.stdout.write(
+                f"{name}: {slow[2]} rows, "
+                f"serializer {slow[0] * 1000:.1f} ms ({slow[0] * 1e6 / rows:.0f} us/row), "
+                f"values {fast[0] * 1000:.1f} ms ({fast[0] * 1e6 / rows:.0f} us/row), "
+                f"speedup x{slow[0] / fast[0]:.2f}"
+            )
+            if identical:
+                self.stdout.write(self.style.SUCCESS(f"{name}: output identical ({len(fast[1])} bytes)"))
+            else:
+                self.stdout.write(self.style.ERROR(f"{name}: output differs"))
+
+        if failed:
+            raise CommandError('values() fast path output differs from the serializer output')
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User {username} not found')
+        user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('No superuser found, pass --username')
+        return user
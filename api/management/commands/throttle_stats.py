@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.throttling import reset_throttle_counters, throttle_counters, throttle_scopes
+
+
+class Command(BaseCommand):
+    help = 'Show allowed / throttled request totals of the token-bucket throttles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scopes', nargs='*', help='throttle scopes (default: all configured)')
+        parser.add_argument('--reset', action='store_true', help='reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        configured = throttle_scopes()
+        scopes = options['scopes'] or configured
+        for scope in scopes:
+            if scope not in configured:
+                raise CommandError(f'Unknown throttle scope {scope}, choose from {", ".join(configured)}')
+            counters = throttle_counters(scope)
+            total = counters['allowed'] + counters['throttled']
+            share = counters['throttled'] / total * 100 if total else 0
+            self.stdout.write(
+                f"{scope}: allowed {counters['allowed']}, throttled {counters['throttled']} ({share:.1f}%)"
+            )
+            if options['reset']:
+                reset_throttle_counters(scope)
@@ -0,0 +1,187 @@
+"""
+Map layer for construction objects: grid clusters at low zoom, bare points
+at high zoom.
+
+The map is cut into tiles of ``360 / 2**zoom`` degrees, each split into
+``CELLS_PER_TILE`` x ``CELLS_PER_TILE`` cells.  Clusters are one grouped
+query over (cell, status) on the (latitude, longitude) index; points are one
+``.values()`` query.  Cells never straddle tiles, so results are cached per
+tile and a request only queries the tiles missing from the cache.
+"""
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Value
+from django.db.models.functions import Floor
+
+MIN_ZOOM = 0
+MAX_ZOOM = 22
+POINT_ZOOM = 15
+CELLS_PER_TILE = 8
+MAX_TILES = 64
+
+CLUSTERS = 'clusters'
+POINTS = 'points'
+
+CACHE_PREFIX = 'map:objects'
+EDGE_EPSILON = 1e-9
+
+
+class MapQueryError(ValueError):
+    """Invalid map query params, rendered as a 400 by the view."""
+
+
+def parse_bbox(params) -> tuple[float, float, float, float]:
+    """`bbox=min_lon,min_lat,max_lon,max_lat` → (min_lat, max_lat, min_lon, max_lon)."""
+    raw = params.get('bbox')
+    if not raw:
+        raise MapQueryError('bbox is required')
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in raw.split(','))
+    except ValueError:
+        raise MapQueryError('bbox must be min_lon,min_lat,max_lon,max_lat')
+    if not all(math.isfinite(v) for v in (min_lon, min_lat, max_lon, max_lat)):
+        raise MapQueryError('bbox must be min_lon,min_lat,max_lon,max_lat')
+    if min_lat > max_lat or min_lon > max_lon:
+        raise MapQueryError('bbox minimum must not exceed its maximum')
+    return max(min_lat, -90.0), min(max_lat, 90.0), max(min_lon, -180.0), min(max_lon, 180.0)
+
+
+def parse_zoom(params) -> int:
+    try:
+        zoom = int(params.get('zoom', ''))
+    except ValueError:
+        raise MapQueryError('zoom must be an integer')
+    if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        raise MapQueryError(f'zoom must be between {MIN_ZOOM} and {MAX_ZOOM}')
+    return zoom
+
+
+def tile_size(zoom: int) -> float:
+    return 360.0 / 2 ** zoom
+
+
+def _index(value: float, origin: float, size: float) -> int:
+    return math.floor((value - origin) / size)
+
+
+def tile_range(bbox, zoom: int) -> list[tuple[int, int]]:
+    """(x, y) of the tiles covering `bbox`, x counted from lon -180 and y from lat -90."""
+    min_lat, max_lat, min_lon, max_lon = bbox
+    size = tile_size(zoom)
+    last = 2 ** zoom - 1
+    xs = range(max(_index(min_lon, -180, size), 0), min(_index(max_lon, -180, size), last) + 1)
+    ys = range(max(_index(min_lat, -90, size), 0), min(_index(max_lat, -90, size), last // 2) + 1)
+    if len(xs) * len(ys) > MAX_TILES:
+        raise MapQueryError(f'bbox covers more than {MAX_TILES} tiles at zoom {zoom}, zoom in')
+    return [(x, y) for x in xs for y in ys]
+
+
+def _tiles_filter(tiles, zoom: int) -> dict:
+    """Range lookups for the box enclosing `tiles`, widened so edge rows are not lost."""
+    size = tile_size(zoom)
+    xs = [x for x, _ in tiles]
+    ys = [y for _, y in tiles]
+    return {
+        'latitude__gte': min(ys) * size - 90 - EDGE_EPSILON,
+        'latitude__lt': (max(ys) + 1) * size - 90 + EDGE_EPSILON,
+        'longitude__gte': min(xs) * size - 180 - EDGE_EPSILON,
+        'longitude__lt': (max(xs) + 1) * size - 180 + EDGE_EPSILON,
+    }
+
+
+def query_clusters(queryset, tiles, zoom: int) -> dict:
+    """Clusters of the given tiles, {(x, y): [cluster, ...]}, from one grouped query."""
+    cell = tile_size(zoom) / CELLS_PER_TILE
+    rows = (
+        queryset.filter(**_tiles_filter(tiles, zoom))
+        .annotate(
+            cell_x=Floor((F('longitude') + Value(180.0)) / Value(cell)),
+            cell_y=Floor((F('latitude') + Value(90.0)) / Value(cell)),
+        )
+        .values('cell_x', 'cell_y', 'status')
+        .annotate(count=Count('id'), lat=Avg('latitude'), lon=Avg('longitude'))
+        .order_by()
+    )
+
+    cells = {}
+    for row in rows:
+        key = (int(row['cell_x']), int(row['cell_y']))
+        cluster = cells.get(key)
+        if cluster is None:
+            cluster = cells[key] = {'lat': 0.0, 'lon': 0.0, 'count': 0, 'statuses': {}}
+        count = row['count']
+        cluster['lat'] += row['lat'] * count
+        cluster['lon'] += row['lon'] * count
+        cluster['count'] += count
+        cluster['statuses'][str(row['status'])] = count
+
+    wanted = set(tiles)
+    result = {tile: [] for tile in tiles}
+    for (cell_x, cell_y), cluster in sorted(cells.items()):
+        tile = (cell_x // CELLS_PER_TILE, cell_y // CELLS_PER_TILE)
+        if tile not in wanted:
+            continue
+        cluster['lat'] /= cluster['count']
+        cluster['lon'] /= cluster['count']
+        result[tile].append(cluster)
+    return result
+
+
+def query_points(queryset, tiles, zoom: int) -> dict:
+    """Minimal rows of the given tiles, {(x, y): [point, ...]}, from one query."""
+    size = tile_size(zoom)
+    rows = (
+        queryset.filter(**_tiles_filter(tiles, zoom))
+        .values_list('id', 'latitude', 'longitude', 'status', 'category')
+        .order_by('id')
+    )
+    wanted = set(tiles)
+    result = {tile: [] for tile in tiles}
+    for pk, lat, lon, status, category in rows:
+        tile = (_index(lon, -180, size), _index(lat, -90, size))
+        if tile in wanted:
+            result[tile].append({'id': pk, 'lat': lat, 'lon': lon, 'status': status, 'category': category})
+    return result
+
+
+def tile_ttl() -> int:
+    return getattr(settings, 'MAP_TILE_TTL', 60)
+
+
+def params_key(params, ignore=('bbox', 'zoom', 'format')) -> str:
+    """Stable digest of the filter params, so differently filtered maps get their own tiles."""
+    items = sorted((k, v) for k in params if k not in ignore for v in params.getlist(k))
+    return hashlib.md5(repr(items).encode()).hexdigest()[:16]
+
+
+def build_map(queryset, bbox, zoom: int, cache_key: str) -> dict:
+    """
+    Clusters of `queryset` in the tiles covering `bbox` below POINT_ZOOM,
+    the points inside `bbox` from there on.  `cache_key` must identify the
+    scope and filters the queryset was built with.
+    """
+    mode = POINTS if zoom >= POINT_ZOOM else CLUSTERS
+    tiles = tile_range(bbox, zoom)
+    keys = {tile: f'{CACHE_PREFIX}:{cache_key}:{mode}:{zoom}:{tile[0]}:{tile[1]}' for tile in tiles}
+
+    cached = cache.get_many(list(keys.values()))
+    data = {tile: cached[key] for tile, key in keys.items() if key in cached}
+    missing = [tile for tile in tiles if tile not in data]
+    if missing:
+        query = query_points if mode == POINTS else query_clusters
+        fresh = query(queryset, missing, zoom)
+        cache.set_many({keys[tile]: items for tile, items in fresh.items()}, timeout=tile_ttl())
+        data.update(fresh)
+
+    items = [item for tile in tiles for item in data[tile]]
+    if mode == POINTS:
+        min_lat, max_lat, min_lon, max_lon = bbox
+        items = [p for p in items if min_lat <= p['lat'] <= max_lat and min_lon <= p['lon'] <= max_lon]
+    result = {'zoom': zoom, 'mode': mode, 'tiles': len(tiles)}
+    if mode == CLUSTERS:
+        result['cell_size'] = tile_size(zoom) / CELLS_PER_TILE
+    result[mode] = items
+    return result
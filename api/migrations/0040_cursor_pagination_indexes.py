@@ -0,0 +1,25 @@
+# Generated by Django 6.0.5 on 2026-10-19 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0039_camera_cameracapture'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['-created_at', 'id'], name='api_issue_created_ce327b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loginattempt',
+            index=models.Index(fields=['-timestamp', 'id'], name='api_loginat_timesta_3054ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publicissue',
+            index=models.Index(fields=['-created_at', 'id'], name='api_publici_created_f07e24_idx'),
+        ),
+    ]
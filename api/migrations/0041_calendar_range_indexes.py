@@ -0,0 +1,25 @@
+# Generated by Django 6.0.5 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0040_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='constructionobject',
+            index=models.Index(fields=['deadline'], name='api_constru_deadlin_533b37_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['status', 'resolve_date'], name='api_issue_status_c8a99c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['planned_date'], name='api_review_planned_33f053_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.5 on 2026-10-19 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0041_calendar_range_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='constructionobject',
+            index=models.Index(fields=['latitude', 'longitude'], name='api_constru_latitud_fb04b5_idx'),
+        ),
+    ]
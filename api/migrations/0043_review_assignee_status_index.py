@@ -0,0 +1,17 @@
+# Generated by Django 6.0.5 on 2026-10-19 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0042_object_location_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['assigned_to', 'status'], name='api_review_assigne_e1f061_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 6.0.5 on 2026-10-19 18:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_last_reported_at(apps, schema_editor):
+    for name in ('Issue', 'PublicIssue'):
+        model = apps.get_model('api', name)
+        model.objects.update(last_reported_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0043_review_assignee_status_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='last_reported_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='report_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='publicissue',
+            name='last_reported_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='publicissue',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='publicissue',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='publicissue',
+            name='report_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(backfill_last_reported_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['object', 'issue_level', 'last_reported_at'], name='api_issue_object__536905_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publicissue',
+            index=models.Index(fields=['construction', 'issue_level', 'last_reported_at'], name='api_publici_constru_f9466b_idx'),
+        ),
+    ]
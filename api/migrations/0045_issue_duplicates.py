@@ -0,0 +1,54 @@
+# Generated by Django 6.0.5 on 2026-10-19 19:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0044_issue_report_dedup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueDuplicate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('reported_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicates', to='api.issue')),
+                ('issue_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.issuetype')),
+            ],
+            options={
+                'verbose_name': 'Takroriy xabar',
+                'verbose_name_plural': 'Takroriy xabarlar',
+                'ordering': ['-reported_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PublicIssueDuplicate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('issuer_fullname', models.CharField(max_length=255)),
+                ('issuer_phone', models.CharField(max_length=32)),
+                ('title', models.CharField(max_length=512)),
+                ('description', models.CharField(max_length=512)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('reported_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicates', to='api.publicissue')),
+            ],
+            options={
+                'verbose_name': 'Takroriy xabar',
+                'verbose_name_plural': 'Takroriy xabarlar',
+                'ordering': ['-reported_at'],
+            },
+        ),
+    ]
@@ -1,8 +1,14 @@
 from django.db.models import QuerySet
 from django.db import models
 
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 from rest_framework.serializers import BaseSerializer, ListSerializer, Serializer
 
+from api.fast_serializers import UnsupportedSerializer, ValuesPlan
+from api.filters import UniversalDRFFilterBackend
+from api.renderers import ColumnarTable
+
 class ReadWriteSerializerMixin:
     """
     Mixin to use different serializers for read vs. write operations.
@@ -21,7 +27,92 @@ class ReadWriteSerializerMixin:
             return self.read_serializer_class
             
         return super().get_serializer_class()
-    
+
+
+class ValuesListMixin:
+    """
+    Opt-in values()-based fast path for the ``list`` action.
+
+    The list serializer is compiled into a ``ValuesPlan`` once per request;
+    the page is read with ``.values()``, nested relations are fetched in one
+    batched query each and the rows are assembled as plain dicts.  The JSON
+    output is identical to the serializer's.  If the serializer uses
+    anything the plan cannot reproduce, the regular ``list`` is used.
+
+    values_list_enabled : bool
+        Set to False (class attribute or ``as_view`` kwarg) to force the
+        regular serializer path, e.g. when benchmarking both.
+
+    With ``?format=columnar`` the rows are built directly as lists for the
+    ColumnarRenderer instead of going through per-row dicts.
+    """
+
+    values_list_enabled: bool = True
+
+    def get_values_plan(self, queryset) -> ValuesPlan:
+        return ValuesPlan(
+            self.get_serializer(),
+            queryset.model,
+            annotations=queryset.query.annotations.keys(),
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.values_list_enabled:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            plan = self.get_values_plan(queryset)
+        except UnsupportedSerializer:
+            return super().list(request, *args, **kwargs)
+
+        rows = plan.values(queryset.select_related(None).prefetch_related(None))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.get_values_data(plan, page))
+        return Response(self.get_values_data(plan, rows))
+
+    def get_values_data(self, plan: ValuesPlan, rows):
+        if getattr(self.request.accepted_renderer, 'format', None) == 'columnar':
+            return ColumnarTable(plan.field_names, plan.serialize_rows(rows))
+        return plan.serialize(rows)
+
+
+class CountQuerysetMixin:
+    """
+    Lets MainPagination count on the filtered queryset *before* the view's
+    annotations (joins, GROUP BY, aggregates) are added.
+
+    Views implement ``get_count_base_queryset()`` returning the scoped,
+    un-annotated queryset; the request's filter backends (except ordering)
+    are applied to it.  When a filter references an annotation, the count
+    falls back to the full queryset.
+    """
+
+    def get_count_base_queryset(self) -> "QuerySet | None":
+        return None
+
+    def get_count_queryset(self, queryset) -> "QuerySet | None":
+        if self.filters_annotations(queryset):
+            return None
+        base = self.get_count_base_queryset()
+        if base is None:
+            return None
+        for backend in self.filter_backends:
+            if not issubclass(backend, OrderingFilter):
+                base = backend().filter_queryset(self.request, base, self)
+        return base
+
+    def filters_annotations(self, queryset) -> bool:
+        if queryset.query.where.contains_aggregate:
+            return True
+        for backend in self.filter_backends:
+            if issubclass(backend, UniversalDRFFilterBackend):
+                plan = backend().get_filter_plan(self.request.query_params, queryset, self)
+                if any(resolved.field is None for _, rules in plan.groups for _, resolved, _ in rules):
+                    return True
+        return False
+
 
 
 def _get_serializer_fields(serializer_class) -> dict:
@@ -226,6 +226,10 @@ class ConstructionObject(models.Model):
         verbose_name_plural = 'Qurilish Loyihalari'
         verbose_name = 'Qurilish Loyihasi'
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['deadline']),
+            models.Index(fields=['latitude', 'longitude']),
+        ]
 
 
 class ConstructionObjectDocumentType(models.Model):
@@ -297,6 +301,7 @@ class Review(models.Model):
 
     class Meta:
         ordering = ['-planned_date']
+        indexes = [models.Index(fields=['planned_date']), models.Index(fields=['assigned_to', 'status'])]
         verbose_name_plural = 'Tekshiruvlar'
         verbose_name = 'Tekshiruv'
 
@@ -389,11 +394,20 @@ class Issue(models.Model):
     issue_type = models.ForeignKey(IssueType, on_delete=models.SET_NULL, null=True)
     issue_level = models.CharField(max_length=10, choices=IssueLevel.choices, default=IssueLevel.GREEN, )
     resolve_date = models.DateTimeField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    report_count = models.PositiveIntegerField(default=1)
+    last_reported_at = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id']),
+            models.Index(fields=['status', 'resolve_date']),
+            models.Index(fields=['object', 'issue_level', 'last_reported_at']),
+        ]
         verbose_name_plural = 'Aniqlangan kamchiliklar'
         verbose_name = 'Aniqlangan kamchilik'
 
@@ -418,6 +432,26 @@ class IssuePhoto(models.Model):
         verbose_name = 'Foto'
 
 
+class IssueDuplicate(models.Model):
+    """A report merged into an open issue (see api.dedup), kept as it was sent."""
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='duplicates')
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    issue_type = models.ForeignKey(IssueType, on_delete=models.SET_NULL, null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    reported_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Duplicate of issue {self.issue_id}"
+
+    class Meta:
+        ordering = ['-reported_at']
+        verbose_name_plural = 'Takroriy xabarlar'
+        verbose_name = 'Takroriy xabar'
+
+
 class LoginAttempt(models.Model):
     user = models.ForeignKey(
         User,
@@ -431,6 +465,7 @@ class LoginAttempt(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [models.Index(fields=['-timestamp', 'id'])]
 
     def __str__(self):
         return f"{self.user.username} - {self.timestamp} - {'Success' if self.successful else 'Failed'}"
@@ -515,11 +550,19 @@ class PublicIssue(models.Model):
     description = models.CharField(max_length=512)
     issue_level = models.CharField(max_length=10, choices=IssueLevel.choices, default=IssueLevel.GREEN, )
     resolve_date = models.DateTimeField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    report_count = models.PositiveIntegerField(default=1)
+    last_reported_at = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id']),
+            models.Index(fields=['construction', 'issue_level', 'last_reported_at']),
+        ]
         verbose_name_plural = 'Jamoatchilik qayd etgan muammolar'
         verbose_name = 'Jamoatchilik qayd etgan muammo'
 
@@ -540,6 +583,26 @@ class PublicIssuePhoto(models.Model):
         verbose_name_plural = 'Foto'
         verbose_name = 'Foto'
 
+
+class PublicIssueDuplicate(models.Model):
+    """A public report merged into an open one (see api.dedup), kept as it was sent."""
+    issue = models.ForeignKey(PublicIssue, on_delete=models.CASCADE, related_name='duplicates')
+    issuer_fullname = models.CharField(max_length=255)
+    issuer_phone = models.CharField(max_length=32)
+    title = models.CharField(max_length=512)
+    description = models.CharField(max_length=512)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    reported_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Duplicate of issue {self.issue_id}"
+
+    class Meta:
+        ordering = ['-reported_at']
+        verbose_name_plural = 'Takroriy xabarlar'
+        verbose_name = 'Takroriy xabar'
+
 class ConstructionFinancing(models.Model):
     construction = models.ForeignKey(ConstructionObject, on_delete=models.CASCADE, verbose_name=_('Qurilish loyihasi'))
     amount = models.PositiveBigIntegerField(default=0, verbose_name=_('Moliyalashtirilgan summa'))
@@ -1,7 +1,257 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from functools import cached_property
+
+from django.conf import settings
+from django.core.paginator import EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator as DjangoPaginator
+from django.db import connections
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+def estimate_count(queryset) -> "int | None":
+    """PostgreSQL planner row estimate for `queryset`, None on other databases."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class NoCountPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class NoCountPaginator(DjangoPaginator):
+    """Paginator without COUNT: reads one extra row to know if a next page exists."""
+    count = None
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        items = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not items and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        return NoCountPage(items[:self.per_page], number, self, len(items) > self.per_page)
+
+
+class CountPaginator(NoCountPaginator):
+    """
+    Paginator that counts `count_queryset` (the filtered queryset without
+    annotations, see CountQuerysetMixin) instead of the page queryset.
+
+    In `estimate` mode a planner estimate above `estimate_threshold` rows
+    replaces the COUNT, but only as `estimated_count` for display: the
+    pages are then read like NoCountPaginator's, so an estimate below the
+    real row count never hides rows or rejects page numbers.
+    """
+
+    def __init__(self, object_list, per_page, count_queryset=None, estimate_threshold=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_queryset = count_queryset
+        self.estimate_threshold = estimate_threshold
+
+    @property
+    def counted_queryset(self):
+        return self.object_list if self.count_queryset is None else self.count_queryset
+
+    @cached_property
+    def estimated_count(self) -> "int | None":
+        if self.estimate_threshold is None:
+            return None
+        estimate = estimate_count(self.counted_queryset)
+        if estimate is not None and estimate > self.estimate_threshold:
+            return estimate
+        return None
+
+    @property
+    def count_estimated(self) -> bool:
+        return self.estimated_count is not None
+
+    @cached_property
+    def count(self):
+        return self.counted_queryset.count()
+
+    def validate_number(self, number):
+        if self.count_estimated:
+            return super().validate_number(number)
+        return DjangoPaginator.validate_number(self, number)
+
+    def page(self, number):
+        if self.count_estimated:
+            return super().page(number)
+        return DjangoPaginator.page(self, number)
 
 
 class MainPagination(PageNumberPagination):
+    """
+    Page-number pagination with three count modes, chosen by the view's
+    `count_mode` or `?count=exact|estimate|none`:
+
+    exact     COUNT, on `view.get_count_queryset()` when the view offers one
+    estimate  planner estimate when it exceeds PAGINATION_ESTIMATE_THRESHOLD,
+              exact below it; an estimated `count` is only displayed (with
+              `count_estimated`), `next` then comes from an extra row
+    none      no COUNT, `count` is null and `next` comes from an extra row
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+    count_modes = ('exact', 'estimate', 'none')
+
+    def get_count_mode(self, request, view=None) -> str:
+        mode = request.query_params.get(self.count_query_param)
+        if mode in self.count_modes:
+            return mode
+        return getattr(view, 'count_mode', 'exact')
+
+    def get_paginator(self, queryset, page_size, request, view=None):
+        mode = self.get_count_mode(request, view)
+        if mode == 'none':
+            return NoCountPaginator(queryset, page_size)
+        get_count_queryset = getattr(view, 'get_count_queryset', None)
+        return CountPaginator(
+            queryset,
+            page_size,
+            count_queryset=get_count_queryset(queryset) if get_count_queryset else None,
+            estimate_threshold=(
+                getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD', 10_000) if mode == 'estimate' else None
+            ),
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.get_paginator(queryset, page_size, request, view)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        if self.has_count(paginator) and paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+    @staticmethod
+    def has_count(paginator) -> bool:
+        """True when the paginator knows the exact row count (and so the last page)."""
+        return not getattr(paginator, 'count_estimated', False) and paginator.count is not None
+
+    def get_page_number(self, request, paginator):
+        page_number = request.query_params.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            if not self.has_count(paginator):
+                raise NotFound(self.invalid_page_message.format(
+                    page_number=page_number, message='Last page is unknown without a count.'
+                ))
+            page_number = paginator.num_pages
+        return page_number
+
+    def get_paginated_response(self, data):
+        paginator = self.page.paginator
+        estimated = getattr(paginator, 'count_estimated', False)
+        response = {
+            'count': paginator.estimated_count if estimated else paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if estimated:
+            response['count_estimated'] = True
+        return Response(response)
+
+
+class MainCursorPagination(CursorPagination):
+    """
+    Keyset pagination: no COUNT and no OFFSET scan, the next page starts
+    after the last row's ordering key.  The first ordering field should be
+    indexed; `id` breaks ties so the order is stable.
+    """
     page_size = 25
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+    ordering = ('-created_at', 'id')
+
+
+class SwitchablePagination(BasePagination):
+    """
+    Page-number or cursor pagination, chosen per request.
+
+    The view picks the default with `pagination_mode` ('page' or 'cursor')
+    and the cursor key with `cursor_ordering`.  Clients override the mode
+    with `?pagination=page|cursor`; a `cursor` param implies cursor mode.
+    Page-number mode keeps `count` for screens that show totals.
+    """
+    mode_query_param = 'pagination'
+    page_class = MainPagination
+    cursor_class = MainCursorPagination
+
+    def __init__(self):
+        self.delegate = self.page_class()
+
+    def get_mode(self, request, view=None) -> str:
+        mode = request.query_params.get(self.mode_query_param)
+        if mode in ('page', 'cursor'):
+            return mode
+        if request.query_params.get(self.cursor_class.cursor_query_param):
+            return 'cursor'
+        return getattr(view, 'pagination_mode', 'page')
+
+    def get_delegate(self, request, view=None):
+        if self.get_mode(request, view) == 'page':
+            return self.page_class()
+        paginator = self.cursor_class()
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            paginator.ordering = ordering
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.delegate = self.get_delegate(request, view)
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.delegate.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.delegate.to_html()
+
+    def get_results(self, data):
+        return self.delegate.get_results(data)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.delegate, 'display_page_controls', False)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *self.page_class().get_schema_operation_parameters(view),
+            *self.cursor_class().get_schema_operation_parameters(view)[:1],
+        ]
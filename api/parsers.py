@@ -0,0 +1,35 @@
+import codecs
+import io
+
+import orjson
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from api.renderers import ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser backed by orjson.
+
+    orjson only reads utf-8 and rejects NaN/Infinity, so other charsets and
+    non-strict mode use the stdlib parser.  Bodies orjson refuses are
+    re-parsed by the stdlib parser as well, which keeps the usual
+    ``JSON parse error`` messages.
+
+    Known difference: integers wider than 64 bits are read as floats.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
@@ -0,0 +1,210 @@
+from datetime import date, datetime, timezone
+
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer backed by orjson.
+
+    orjson handles dict/list/str/int/float, date, datetime and UUID natively
+    with the same formatting DRF produces (UTC datetimes end with ``Z``).
+    Everything else (Decimal, lazy translation strings, querysets …) goes
+    through DRF's own ``JSONEncoder.default`` so it is rendered exactly as
+    before.  Indented output, ASCII-only output and payloads orjson refuses
+    (non-string keys, ints wider than 64 bits) use the stdlib renderer.
+
+    Known difference: floats below 1e-4 print their exponent without the
+    zero padding Python adds (``1e-7`` instead of ``1e-07``).
+    """
+
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._encoder.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same \u2028 / \u2029 escaping as JSONRenderer, on the utf-8 bytes.
+        if b'\xe2\x80' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ColumnarTable(dict):
+    """A list payload already in columnar form: ``{"columns": [...], "rows": [[...], ...]}``."""
+
+    def __init__(self, columns, rows):
+        super().__init__(columns=columns, rows=rows)
+
+
+def to_columnar(items: list) -> ColumnarTable:
+    """Convert a list of serializer dicts into a ColumnarTable."""
+    columns = {}
+    for item in items:
+        for key in item:
+            columns.setdefault(key, None)
+    columns = list(columns)
+    return ColumnarTable(columns, [[item.get(key) for key in columns] for item in items])
+
+
+def dictionary_encode(table: ColumnarTable, fields) -> ColumnarTable:
+    """
+    Replace the values of low-cardinality columns by indexes into
+    ``table["dictionaries"][column]``.  Columns holding unhashable values
+    (nested objects, lists) are left as they are.
+    """
+    columns = table["columns"]
+    rows = table["rows"]
+    dictionaries = {}
+    for field in fields:
+        if field not in columns:
+            continue
+        index = columns.index(field)
+        lookup = {}
+        try:
+            for row in rows:
+                lookup.setdefault(row[index], len(lookup))
+        except TypeError:
+            continue
+        for row in rows:
+            row[index] = lookup[row[index]]
+        dictionaries[field] = list(lookup)
+    if dictionaries:
+        table["dictionaries"] = dictionaries
+    return table
+
+
+class ColumnarRenderer(ORJSONRenderer):
+    """
+    Compact JSON for large lists, selected with ``?format=columnar``.
+
+    List payloads (plain or paginated ``results``) are rendered as
+    ``{"columns": [...], "rows": [[...], ...]}`` so keys are not repeated in
+    every row.  Columns named by the view's ``columnar_dictionary_fields``,
+    or by ``?dictionary=status,category``, are dictionary-encoded: rows hold
+    indexes and the distinct values are listed once under ``dictionaries``.
+    Any other payload (details, errors) is rendered as plain JSON.
+    """
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        response = renderer_context.get('response')
+        if response is not None and response.exception:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if isinstance(data, (list, ColumnarTable)):
+            data = self.get_table(data, renderer_context)
+        elif isinstance(data, dict) and isinstance(data.get('results'), (list, ColumnarTable)):
+            data = {**data, 'results': self.get_table(data['results'], renderer_context)}
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def get_table(self, items, renderer_context) -> ColumnarTable:
+        table = items if isinstance(items, ColumnarTable) else to_columnar(items)
+        return dictionary_encode(table, self.get_dictionary_fields(renderer_context))
+
+    def get_dictionary_fields(self, renderer_context):
+        request = renderer_context.get('request')
+        if request is not None and 'dictionary' in request.query_params:
+            return [f.strip() for f in request.query_params['dictionary'].split(',') if f.strip()]
+        return getattr(renderer_context.get('view'), 'columnar_dictionary_fields', ())
+
+
+class ICalendarRenderer(BaseRenderer):
+    """
+    Renders a calendar feed (``{"events": [...]}`` with ``uid``, ``title``,
+    ``start``, ``end``, ``updated_at`` and ``extendedProps.description`` per
+    event) as an RFC 5545 VCALENDAR.  Error responses fall back to JSON.
+    """
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+    calendar_name = 'Qurilish Nazorati'
+    uid_domain = 'muallifnazorat.uz'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        response = renderer_context.get('response')
+        if response is not None and (response.exception or 'events' not in (data or {})):
+            response['Content-Type'] = 'application/json'
+            return ORJSONRenderer().render(data, 'application/json', renderer_context)
+
+        lines = [
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:-//Qurilish Nazorati//Calendar//UZ',
+            'CALSCALE:GREGORIAN',
+            f'X-WR-CALNAME:{self.escape(self.calendar_name)}',
+        ]
+        stamp = self.format_value(datetime.now(timezone.utc).isoformat())
+        for event in data['events']:
+            description = (event.get('extendedProps') or {}).get('description') or ''
+            lines += [
+                'BEGIN:VEVENT',
+                f"UID:{event['uid']}@{self.uid_domain}",
+                f'DTSTAMP:{stamp}',
+                self.date_line('DTSTART', event['start']),
+                self.date_line('DTEND', event['end']),
+                f"SUMMARY:{self.escape(event['title'])}",
+            ]
+            if event.get('project_name'):
+                lines.append(f"LOCATION:{self.escape(event['project_name'])}")
+            if description:
+                lines.append(f'DESCRIPTION:{self.escape(description)}')
+            if event.get('updated_at'):
+                lines.append(f"LAST-MODIFIED:{self.format_value(event['updated_at'])}")
+            lines.append('STATUS:CANCELLED' if event.get('status') == 'cancelled' else 'STATUS:CONFIRMED')
+            lines.append('END:VEVENT')
+        lines.append('END:VCALENDAR')
+        return ''.join(self.fold(line) + '\r\n' for line in lines).encode(self.charset)
+
+    @staticmethod
+    def escape(value) -> str:
+        return (
+            str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n')
+        )
+
+    @staticmethod
+    def format_value(value: str) -> str:
+        """ISO date → ``YYYYMMDD``, ISO datetime → UTC ``YYYYMMDDTHHMMSSZ``."""
+        if 'T' not in value and len(value) == 10:
+            return date.fromisoformat(value).strftime('%Y%m%d')
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+        return moment.strftime('%Y%m%dT%H%M%SZ')
+
+    def date_line(self, name: str, value: str) -> str:
+        formatted = self.format_value(value)
+        return f'{name};VALUE=DATE:{formatted}' if 'T' not in formatted else f'{name}:{formatted}'
+
+    @staticmethod
+    def fold(line: str) -> str:
+        """Fold lines longer than 75 octets (RFC 5545 §3.1)."""
+        encoded = line.encode('utf-8')
+        if len(encoded) <= 75:
+            return line
+        parts, current, size = [], '', 0
+        for char in line:
+            width = len(char.encode('utf-8'))
+            if size + width > (75 if not parts else 74):
+                parts.append(current)
+                current, size = '', 0
+            current += char
+            size += width
+        parts.append(current)
+        return '\r\n '.join(parts)
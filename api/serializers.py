@@ -206,6 +206,7 @@ class ReviewSerializer(BaseReviewSerializer):
     assigned_to = UserSerializer(read_only=True)
     latitude = serializers.FloatField(read_only=True)
     longitude = serializers.FloatField(read_only=True)
+    distance = serializers.FloatField(read_only=True)
 
 
 class IssuePhotoSerializer(serializers.ModelSerializer):
@@ -222,7 +223,7 @@ class CreateIssueSerializer(serializers.ModelSerializer):
     class Meta:
         model = Issue
         fields = '__all__'
-        read_only_fields = ['created_by', 'created_at', 'updated_at']
+        read_only_fields = ['created_by', 'created_at', 'updated_at', 'report_count', 'last_reported_at']
 
     def to_representation(self, instance):
         context = super().to_representation(instance)
@@ -265,6 +266,7 @@ class CreatePublicIssueSerializer(serializers.ModelSerializer):
     class Meta:
         model = PublicIssue
         fields = '__all__'
+        read_only_fields = ['report_count', 'last_reported_at']
 
 
 class PublicIssuePhotoSerializer(serializers.ModelSerializer):
@@ -411,7 +413,7 @@ class IssueSerializer(serializers.ModelSerializer):
     class Meta:
         model = Issue
         fields = '__all__'
-        read_only_fields = ['created_by', 'created_at', 'updated_at']
+        read_only_fields = ['created_by', 'created_at', 'updated_at', 'report_count', 'last_reported_at']
 
 
 class CameraCaptureSerializer(serializers.ModelSerializer):
@@ -1,3 +1,295 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from django.http import QueryDict
+from rest_framework.exceptions import ValidationError
+
+from api import views
+from api.fast_serializers import ValuesPlan
+from api.filters import UniversalDRFFilterBackend, resolve_lookup
+from api.models import (
+    ConstructionCompany, ConstructionDailyProgress, ConstructionFinancing, ConstructionObject, District,
+    GovermentProgram, InspectionType, Issue, IssueType, Neighborhood, Person, PublicIssue, Region, Report, Review,
+    User,
+)
+from api.renderers import ORJSONRenderer
+from api.serializers import ConstructionObjectSerializer, CreatePublicIssueSerializer
+from api.pagination import MainPagination
+from api.throttling import TOKEN_BUCKET_SCRIPT, PublicReportThrottle
+
+
+@override_settings(PAGINATION_ESTIMATE_THRESHOLD=5)
+class EstimatedCountPaginationTests(TestCase):
+    """The planner estimate is below the real row count: it must not cut pages off."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Region.objects.bulk_create(Region(name=f'Region {i}') for i in range(30))
+
+    def paginate(self, page):
+        request = Request(APIRequestFactory().get('/', {'count': 'estimate', 'page_size': 10, 'page': page}))
+        pagination = MainPagination()
+        with mock.patch('api.pagination.estimate_count', return_value=10):
+            rows = pagination.paginate_queryset(Region.objects.order_by('pk'), request)
+            response = pagination.get_paginated_response([row.name for row in rows])
+        return response.data
+
+    def test_pages_past_the_estimate(self):
+        second = self.paginate(2)
+        self.assertEqual(second['results'], [f'Region {i}' for i in range(10, 20)])
+        self.assertIsNotNone(second['next'])
+
+        last = self.paginate(3)
+        self.assertEqual(last['results'], [f'Region {i}' for i in range(20, 30)])
+        self.assertIsNone(last['next'])
+
+    def test_estimate_is_only_displayed(self):
+        data = self.paginate(1)
+        self.assertEqual(data['count'], 10)
+        self.assertTrue(data['count_estimated'])
+        self.assertEqual(len(data['results']), 10)
+
+
+THROTTLE_RATES = {
+    'public_report_ip_burst': '20/min',
+    'public_report_ip_sustained': '120/hour',
+    'public_report_device_burst': '5/min',
+    'public_report_device_sustained': '30/hour',
+}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': THROTTLE_RATES})
+class TokenBucketThrottleTests(TestCase):
+
+    def allow(self):
+        request = Request(APIRequestFactory().post('/', REMOTE_ADDR='10.0.0.1', HTTP_X_DEVICE_FINGERPRINT='device'))
+        request.user = AnonymousUser()
+        throttle = PublicReportThrottle()
+        return throttle.allow_request(request, None), throttle.wait()
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/15',
+    }})
+    def test_redis_cache_takes_tokens_in_the_lua_script(self):
+        client = mock.Mock()
+        client.register_script.return_value.side_effect = [b'0', b'11.5']
+        with mock.patch('api.throttling.redis_client', return_value=client), \
+                mock.patch.object(PublicReportThrottle, 'take_tokens') as take_tokens, \
+                mock.patch.object(PublicReportThrottle, 'count'):
+            self.assertEqual(self.allow(), (True, None))
+            self.assertEqual(self.allow(), (False, 11.5))
+
+        take_tokens.assert_not_called()
+        client.register_script.assert_called_with(TOKEN_BUCKET_SCRIPT)
+        keys = client.register_script.return_value.call_args.kwargs['keys']
+        self.assertEqual(len(keys), 4)
+        self.assertTrue(all(':throttle:public_report:' in key for key in keys))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_other_caches_use_the_device_burst(self):
+        allowed = [self.allow()[0] for _ in range(7)]
+        self.assertEqual(allowed, [True] * 5 + [False] * 2)
+
+
+class MultiValuedLookupTests(TestCase):
+    """EXISTS rewrites across reverse FKs and M2M select the same rows as a plain .filter() / .exclude()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='owner')
+        person = Person.objects.create(fullname='Director')
+        cls.first = ConstructionCompany.objects.create(name='First', director=person, contact_person=person)
+        cls.second = ConstructionCompany.objects.create(name='Second', director=person, contact_person=person)
+
+        def construction(name, companies=(), reviews=()):
+            obj = ConstructionObject.objects.create(
+                name=name, address=name, latitude=41.3, longitude=69.2, owner=user, developer=user,
+            )
+            obj.construction_companies.set(companies)
+            for status, assigned_to in reviews:
+                Review.objects.create(
+                    name=name, object=obj, planned_date='2026-01-01T00:00Z', status=status, assigned_to=assigned_to,
+                )
+            return obj
+
+        construction('Two reviews', [cls.first], [('planned', user), ('completed', None)])
+        construction('Completed review', [cls.first, cls.second], [('completed', user)])
+        construction('Planned review', [cls.second], [('planned', user)])
+        construction('Bare')
+
+    def assertSameRows(self, lookup_expr, value, exclude=False):
+        queryset = ConstructionObject.objects.all()
+        expected = queryset.exclude(**{lookup_expr: value}) if exclude else queryset.filter(**{lookup_expr: value})
+        q = resolve_lookup(ConstructionObject, lookup_expr).build_q(value, exclude)
+        self.assertEqual(
+            sorted(queryset.filter(q).values_list('pk', flat=True)),
+            sorted(set(expected.values_list('pk', flat=True))),
+            f'{lookup_expr}={value!r} exclude={exclude}',
+        )
+
+    def test_isnull(self):
+        for lookup_expr in ('review__isnull', 'construction_companies__isnull', 'review__assigned_to__isnull'):
+            for value in (True, False):
+                for exclude in (False, True):
+                    self.assertSameRows(lookup_expr, value, exclude)
+
+    def test_in(self):
+        for exclude in (False, True):
+            self.assertSameRows('review__status__in', ['completed'], exclude)
+            self.assertSameRows('construction_companies__in', [self.second.pk], exclude)
+            self.assertSameRows('construction_companies__name__in', ['First'], exclude)
+
+    def test_negated(self):
+        self.assertSameRows('review__status', 'completed', exclude=True)
+        self.assertSameRows('review__assigned_to', None, exclude=True)
+        self.assertSameRows('construction_companies', self.first.pk, exclude=True)
+
+
+class FilterWhitelistTests(TestCase):
+
+    def filter(self, view, queryset, params):
+        request = Request(APIRequestFactory().get('/', QueryDict(params)))
+        return UniversalDRFFilterBackend().filter_queryset(request, queryset, view)
+
+    def test_unlisted_traversal_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.filter(views.PersonView(), Person.objects.all(), 'profile__password__startswith=pbkdf2')
+
+    def test_view_without_whitelist_accepts_only_its_filterset_fields(self):
+        view = views.GovernmentProgramViewSet()
+        with self.assertRaises(ValidationError):
+            self.filter(view, GovermentProgram.objects.all(), 'name=x')
+
+    def test_listed_text_lookup_is_accepted(self):
+        queryset = self.filter(views.PersonView(), Person.objects.all(), 'fullname__icontains=ali')
+        self.assertIn('LIKE', str(queryset.query))
+
+
+class PublicIssueDedupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='owner')
+        cls.construction = ConstructionObject.objects.create(
+            name='School', address='School', latitude=41.3, longitude=69.2, owner=user, developer=user,
+        )
+
+    def report(self, **data):
+        view = views.PublicIssueViewSet.as_view({'post': 'create'}, throttle_classes=[])
+        payload = {
+            'issuer_fullname': 'Reporter', 'issuer_phone': '+998900000000', 'construction': self.construction.pk,
+            'title': 'Open pit', 'description': 'No fence', 'issue_level': 'red', **data,
+        }
+        return view(APIRequestFactory().post('/', payload, format='json'))
+
+    def test_new_report_goes_through_the_serializer(self):
+        with mock.patch.object(
+            CreatePublicIssueSerializer, 'create', autospec=True, side_effect=CreatePublicIssueSerializer.create,
+        ) as create:
+            response = self.report()
+        self.assertEqual(response.status_code, 201)
+        create.assert_called_once()
+
+    def test_duplicate_keeps_its_content(self):
+        parent = self.report().data['id']
+        response = self.report(issuer_fullname='Neighbour', title='Pit again', description='Still no fence')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], parent)
+        self.assertEqual(response.data['report_count'], 2)
+        self.assertEqual(PublicIssue.objects.count(), 1)
+        duplicate = PublicIssue.objects.get(pk=parent).duplicates.get()
+        self.assertEqual(
+            (duplicate.issuer_fullname, duplicate.title, duplicate.description),
+            ('Neighbour', 'Pit again', 'Still no fence'),
+        )
+
+
+class ValuesListOutputTests(TestCase):
+    """The values() fast path renders the same bytes as the serializers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='inspector', is_superuser=True)
+        person = Person.objects.create(fullname='Director', profile=cls.user)
+        company = ConstructionCompany.objects.create(name='Builder', director=person, contact_person=person)
+        company.personal.set([person])
+        region = Region.objects.create(name='Region')
+        district = District.objects.create(name='District', region=region)
+        neighborhood = Neighborhood.objects.create(name='Neighborhood', district=district)
+        program = GovermentProgram.objects.create(name='Program', code='PP-1')
+
+        school = ConstructionObject.objects.create(
+            name='School', address='School', latitude=41.3, longitude=69.2, owner=cls.user, developer=cls.user,
+            neighborhood=neighborhood, program=program, budget=1000,
+        )
+        school.construction_companies.set([company])
+        ConstructionFinancing.objects.create(construction=school, amount=250, person=person)
+        ConstructionDailyProgress.objects.create(construction=school, date='2026-05-01', amount=100)
+        # null FKs, no M2M rows and no totals
+        bare = ConstructionObject.objects.create(
+            name='Bare', address='Bare', latitude=41.3, longitude=69.2, owner=cls.user, developer=cls.user,
+        )
+
+        review = Review.objects.create(name='Review', object=school, planned_date='2026-01-01T00:00Z', assigned_to=cls.user)
+        review.inspection_types.set([InspectionType.objects.create(name='Planned')])
+        Report.objects.create(review=review, comment='Done', created_by=cls.user)
+        Review.objects.create(name='Unassigned', object=bare, planned_date='2026-01-02T00:00Z')
+
+        issue_type = IssueType.objects.create(name='Safety')
+        Issue.objects.create(
+            title='Open pit', description='No fence', review=review, object=school, issue_type=issue_type,
+            created_by=cls.user,
+        )
+        Issue.objects.create(title='Orphan', description='No links')
+
+        PublicIssue.objects.create(
+            issuer_fullname='Reporter', issuer_phone='+998900000000', construction=school,
+            title='Open pit', description='No fence',
+        )
+        PublicIssue.objects.create(issuer_fullname='Reporter', issuer_phone='+998900000000', title='Lost', description='')
+
+    def render(self, view_class, params, enabled):
+        view = view_class.as_view({'get': 'list'}, values_list_enabled=enabled, throttle_classes=[])
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.user)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        return response.render().content
+
+    def assertSameOutput(self, view_class, params):
+        serializer = self.render(view_class, params, False)
+        with mock.patch.object(
+            ValuesPlan, 'serialize_rows', autospec=True, side_effect=ValuesPlan.serialize_rows,
+        ) as serialize_rows:
+            values = self.render(view_class, params, True)
+        serialize_rows.assert_called()
+        self.assertEqual(values, serializer)
+        return serializer
+
+    def test_list_views(self):
+        cases = [
+            (views.ConstructionsView, {'ordering': 'id'}, b'"financed":250.0'),
+            (views.InspectionsView, {'ordering': 'id'}, b'"assigned_to":null'),
+            (views.IssuesView, {'pagination': 'cursor'}, b'"review":null'),
+            (views.PublicIssueViewSet, {'pagination': 'cursor'}, b'"construction":null'),
+        ]
+        for view_class, params, expected in cases:
+            with self.subTest(view_class.__name__):
+                self.assertIn(expected, self.assertSameOutput(view_class, params))
+
+    def test_skipped_field(self):
+        """``neighborhood__district`` is no attribute of the object: DRF skips it, so must the plan."""
+        queryset = ConstructionObject.objects.order_by('pk')
+        serializer = ConstructionObjectSerializer(queryset, many=True)
+        plan = ValuesPlan(serializer.child, ConstructionObject)
+
+        self.assertNotIn('neighborhood__district', plan.field_names)
+        renderer = ORJSONRenderer()
+        self.assertEqual(renderer.render(plan.serialize(plan.values(queryset))), renderer.render(serializer.data))
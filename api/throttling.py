@@ -0,0 +1,210 @@
+"""
+Token-bucket throttling for the anonymous public endpoints.
+
+Only anonymous POSTs, i.e. new reports, are throttled; listing, staff
+updates and authenticated users are left alone.
+
+A request is checked against two clients, each with a burst and a
+sustained bucket per scope, configured in
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']:
+
+    <scope>_ip_burst / _ip_sustained          the IP, the hard limit; clients
+                                              behind one NAT share it
+    <scope>_device_burst / _device_sustained  the device fingerprint, tighter
+
+    burst      e.g. '5/min'   – how many requests may arrive at once
+    sustained  e.g. '30/hour' – the long-run rate
+
+The device is the `X-Device-Fingerprint` header; without it, the IP and
+User-Agent.  The header is client-chosen, so rotating it only gets fresh
+device buckets, never past the IP's.
+
+A bucket holds up to `num` tokens and refills at `num / period`; a request
+must find a token in every bucket and takes one from each.  On the Redis
+cache a bucket is a (tokens, timestamp) hash, and the check and the take
+run as one Lua script, so concurrent requests can't overspend it.  Other
+cache backends (locmem in development) fall back to a get_many and a set
+per bucket, which is not atomic.
+
+Allowed / throttled totals per scope are kept in the cache, see
+`throttle_counters` and the `throttle_stats` command.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache as default_cache, caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+CLIENTS = ('ip', 'device')
+BUCKETS = ('burst', 'sustained')
+OUTCOMES = ('allowed', 'throttled')
+KEY_PREFIX = 'throttle'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS: the buckets; ARGV: now, then capacity and refill (tokens/s) of each.
+# Returns the seconds until every bucket has a token, '0' once one was taken
+# from each.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local deficit = 0
+for i, key in ipairs(KEYS) do
+    local capacity, refill = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = capacity
+    if state[1] then
+        level = math.min(capacity, tonumber(state[1]) + math.max(now - tonumber(state[2]), 0) * refill)
+    end
+    levels[i] = level
+    if level < 1 then
+        deficit = math.max(deficit, (1 - level) / refill)
+    end
+end
+if deficit > 0 then
+    return tostring(deficit)
+end
+for i, key in ipairs(KEYS) do
+    local capacity, refill = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', key, 'tokens', levels[i] - 1, 'ts', now)
+    -- the key can expire once the bucket would be full again
+    redis.call('EXPIRE', key, math.floor((capacity - levels[i] + 1) / refill) + 1)
+end
+return '0'
+"""
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """'30/hour' → (30, 3600), same format as DRF's rates."""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def throttle_scopes() -> list[str]:
+    """Scopes with token-bucket rates configured."""
+    scopes = set()
+    for name in api_settings.DEFAULT_THROTTLE_RATES or {}:
+        rest, _, bucket = name.rpartition('_')
+        scope, _, client = rest.rpartition('_')
+        if client in CLIENTS and bucket in BUCKETS:
+            scopes.add(scope)
+    return sorted(scopes)
+
+
+def redis_client(cache: RedisCache):
+    """
+    The redis-py client behind Django's RedisCache.  The backend has no
+    public accessor, so this is the one place relying on its internals.
+    """
+    return cache._cache.get_client(write=True)
+
+
+def _counter_key(scope: str, outcome: str) -> str:
+    return f'{KEY_PREFIX}:{scope}:{outcome}'
+
+
+def throttle_counters(scope: str, cache=default_cache) -> dict:
+    values = cache.get_many([_counter_key(scope, outcome) for outcome in OUTCOMES])
+    return {outcome: values.get(_counter_key(scope, outcome), 0) for outcome in OUTCOMES}
+
+
+def reset_throttle_counters(scope: str, cache=default_cache) -> None:
+    cache.delete_many([_counter_key(scope, outcome) for outcome in OUTCOMES])
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Burst + sustained token buckets per IP and per device; only anonymous POSTs are throttled."""
+    scope = None
+    cache_alias = 'default'
+    throttled_methods = ('POST',)
+    fingerprint_header = 'HTTP_X_DEVICE_FINGERPRINT'
+
+    def __init__(self):
+        rates = api_settings.DEFAULT_THROTTLE_RATES or {}
+        # (client, bucket) -> (capacity, tokens per second)
+        self.buckets = {}
+        for client in CLIENTS:
+            for bucket in BUCKETS:
+                rate = rates.get(f'{self.scope}_{client}_{bucket}')
+                if rate:
+                    num, duration = parse_rate(rate)
+                    self.buckets[(client, bucket)] = (num, num / duration)
+        self.deficit = 0.0
+
+    @property
+    def cache(self):
+        # the backend itself: django.core.cache.cache is a proxy, not a RedisCache
+        return caches[self.cache_alias]
+
+    def get_fingerprint(self, request) -> str:
+        fingerprint = request.META.get(self.fingerprint_header)
+        if fingerprint:
+            return fingerprint
+        return f"{self.get_ident(request)}|{request.META.get('HTTP_USER_AGENT', '')}"
+
+    def get_cache_key(self, request, client: str, bucket: str) -> str:
+        ident = self.get_ident(request) if client == 'ip' else self.get_fingerprint(request)
+        digest = hashlib.md5(ident.encode()).hexdigest()
+        return f'{KEY_PREFIX}:{self.scope}:{client}:{bucket}:{digest}'
+
+    def allow_request(self, request, view):
+        if not self.buckets or request.method not in self.throttled_methods:
+            return True
+        if request.user and request.user.is_authenticated:
+            return True
+
+        keys = [self.get_cache_key(request, *name) for name in self.buckets]
+        if isinstance(self.cache, RedisCache):
+            self.deficit = self.take_tokens_atomic(keys)
+        else:
+            self.deficit = self.take_tokens(keys)
+
+        if self.deficit:
+            self.count('throttled')
+            return False
+        self.count('allowed')
+        return True
+
+    def take_tokens_atomic(self, keys: list[str]) -> float:
+        """Seconds to wait when a bucket is empty, else 0 with a token taken from each."""
+        args = [time.time()]
+        for capacity, refill in self.buckets.values():
+            args += [capacity, refill]
+        cache = self.cache
+        script = redis_client(cache).register_script(TOKEN_BUCKET_SCRIPT)
+        return float(script(keys=[cache.make_and_validate_key(key) for key in keys], args=args))
+
+    def take_tokens(self, keys: list[str]) -> float:
+        """take_tokens_atomic as a non-atomic read-modify-write, for other cache backends."""
+        now = time.time()
+        stored = self.cache.get_many(keys)
+
+        levels = []
+        deficit = 0.0
+        for key, (capacity, refill) in zip(keys, self.buckets.values()):
+            level, updated = stored.get(key, (capacity, now))
+            level = min(capacity, level + (now - updated) * refill)
+            levels.append(level)
+            if level < 1:
+                deficit = max(deficit, (1 - level) / refill)
+        if deficit:
+            return deficit
+
+        for key, level, (capacity, refill) in zip(keys, levels, self.buckets.values()):
+            # the entry can expire once the bucket would be full again
+            timeout = int((capacity - level + 1) / refill) + 1
+            self.cache.set(key, (level - 1, now), timeout=timeout)
+        return 0.0
+
+    def count(self, outcome: str) -> None:
+        key = _counter_key(self.scope, outcome)
+        self.cache.add(key, 0, timeout=None)
+        self.cache.incr(key)
+
+    def wait(self):
+        return self.deficit or None
+
+
+class PublicReportThrottle(TokenBucketThrottle):
+    scope = 'public_report'
@@ -3,18 +3,27 @@ from datetime import datetime, timedelta, date
 from django.contrib.auth import get_user_model
 from django.db.models import Q, F, DecimalField, FloatField, Sum, Count, QuerySet, Max
 from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter
 
-from api.filters import ConstructionObjectFilter, UniversalDRFFilterBackend
-from api.mixins import AutoRelatedMixin, ReadWriteSerializerMixin
+from api.filters import ConstructionObjectFilter, UniversalDRFFilterBackend, resolve_lookup
+from api.mixins import AutoRelatedMixin, CountQuerysetMixin, ReadWriteSerializerMixin, ValuesListMixin
+from api.pagination import SwitchablePagination
 from rest_framework import status, generics, permissions, viewsets, filters
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.generics import get_object_or_404, ListAPIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.views import APIView
 
+from api import calendar_events, dedup, geo, map_clusters
+from api.renderers import ICalendarRenderer, ORJSONRenderer
+from api.throttling import PublicReportThrottle
 from api.report_engine import ReportQueryEngine
 
 from .authentication import BruteforceProtectedJWTAuthentication
@@ -76,7 +85,7 @@ from .serializers import (
     CameraCaptureSerializer, CameraSerializer,
 )
 from .services import get_live_address, HikConnectError
-from .utils import unblock_user, get_user_login_stats, haversine_distance
+from .utils import unblock_user, get_user_login_stats
 
 
 class ProfileView(APIView):
@@ -87,13 +96,98 @@ class ProfileView(APIView):
         return Response(serializer.data)
 
 
-class ConstructionsView(AutoRelatedMixin, viewsets.ModelViewSet):
+def role_filters(user) -> dict:
+    """ConstructionObject lookups limiting `user` to the objects of their district or companies."""
+    filters_map = {}
+    if hasattr(user, 'role') and user.role == UserRole.PROKURATURA:
+        filters_map['neighborhood__district__in'] = user.person.district_set.all()
+    elif hasattr(user, 'role') and user.role == UserRole.BUILDER:
+        filters_map['construction_companies__in'] = user.person.constructioncompany_set.all()
+    elif hasattr(user, 'role') and user.role == UserRole.DEVELOPER:
+        filters_map['project_companies__in'] = user.person.projectdevelopercompany_set.all()
+    elif hasattr(user, 'role') and user.role == UserRole.OWNER:
+        filters_map['owner_companies__in'] = user.person.projectownercompany_set.all()
+    return filters_map
+
+
+def object_totals(queryset) -> QuerySet:
+    """Financing / progress / review totals shown by the objects list (also used for realtime rows)."""
+    month = datetime.now().month
+    return queryset.annotate(
+        financed=Coalesce(
+            Sum("constructionfinancing__amount"), 0, output_field=DecimalField(default=0)
+        ),
+        financed_p=Coalesce(
+            F("financed") / F('budget') * 100, 0, output_field=DecimalField(default=0)
+        ),
+        completed=Coalesce(
+            Sum("constructiondailyprogress__amount"),
+            0,
+            output_field=DecimalField(default=0),
+        ),
+        completed_p=Coalesce(
+            F("completed") / NullIf(F('financed'), 0.0) * 100, 0, output_field=DecimalField(default=0)
+        ),
+        p_reviews=Coalesce(
+            Count("review", filter=Q(review__inspection_types=1, review__status='completed',
+                                     review__planned_date__month=month)), 0,
+            output_field=DecimalField(default=0)
+        ),
+        i_reviews=Coalesce(
+            Count("review", filter=Q(review__inspection_types=2) & Q(review__status='completed')), 0,
+            output_field=DecimalField(default=0)
+        ),
+        t_reviews=Coalesce(
+            Count("review", filter=Q(review__inspection_types=3) & Q(review__status='completed')), 0,
+            output_field=DecimalField(default=0)
+        ),
+        last_update=Coalesce(
+            Max("constructiondailyprogress__date"),
+            date(2026, 6, 1),
+        ),
+    )
+
+
+class ConstructionsView(CountQuerysetMixin, ValuesListMixin, AutoRelatedMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = ConstructionObjectSerializer
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter, filters.OrderingFilter)
     filterset_class = ConstructionObjectFilter
+    filter_lookups = {
+        "id": ["exact", "in"],
+        "name": ["icontains"],
+        "address": ["icontains"],
+        "status": ["exact", "in"],
+        "category": ["exact", "in"],
+        "neighborhood": ["exact", "in"],
+        "neighborhood__district": ["exact", "in"],
+        "neighborhood__district__region": ["exact", "in"],
+        "program": ["exact", "in", "isnull"],
+        "is_government": ["exact"],
+        "owner": ["exact", "in"],
+        "developer": ["exact", "in"],
+        "attached_person": ["exact", "in"],
+        "owner_companies": ["exact", "in"],
+        "project_companies": ["exact", "in"],
+        "construction_companies": ["exact", "in"],
+        "deadline": ["exact", "gte", "lte", "isnull"],
+        "budget": ["gte", "lte"],
+        "contract_amount": ["gte", "lte"],
+        "created_at": ["gte", "lte"],
+        # annotations of object_totals
+        "financed": ["exact", "gte", "lte"],
+        "financed_p": ["gte", "lte"],
+        "completed": ["gte", "lte"],
+        "completed_p": ["gte", "lte"],
+        "last_update": ["exact", "gte", "lte"],
+        "p_reviews": ["gte", "lte"],
+        "i_reviews": ["gte", "lte"],
+        "t_reviews": ["gte", "lte"],
+    }
     queryset = ConstructionObject.objects.all()
     search_fields = ("name",)
+    columnar_dictionary_fields = ("status", "category")
+    filter_ignore_params = ("bbox", "zoom")
     ordering_fields = (
         "id", "name", "neighborhood", "address",
         "category", "p_reviews_p_m", "i_reviews_p_m", "t_reviews_p_m",
@@ -104,51 +198,26 @@ class ConstructionsView(AutoRelatedMixin, viewsets.ModelViewSet):
         "last_update", "p_reviews", "i_reviews", "t_reviews",
     )
 
-    def get_queryset(self) -> QuerySet:
+    def get_scope_q(self) -> "Q | None":
+        """Role-based restriction, as EXISTS subqueries so it never multiplies the annotated sums."""
+        filters_map = role_filters(self.request.user)
+        if not filters_map:
+            return None
+        return Q(*(
+            resolve_lookup(ConstructionObject, lookup).build_q(value, exclude=False)
+            for lookup, value in filters_map.items()
+        ))
+
+    def get_count_base_queryset(self) -> QuerySet:
         queryset = super().get_queryset()
-        filters_map = {}
-        if hasattr(self.request.user, 'role') and self.request.user.role == UserRole.PROKURATURA:
-            filters_map['neighborhood__district__in'] = self.request.user.person.district_set.all()
-        elif hasattr(self.request.user, 'role') and self.request.user.role == UserRole.BUILDER:
-            filters_map['construction_companies__in'] = self.request.user.person.constructioncompany_set.all()
-        elif hasattr(self.request.user, 'role') and self.request.user.role == UserRole.DEVELOPER:
-            filters_map['project_companies__in'] = self.request.user.person.projectdevelopercompany_set.all()
-        elif hasattr(self.request.user, 'role') and self.request.user.role == UserRole.OWNER:
-            filters_map['owner_companies__in'] = self.request.user.person.projectownercompany_set.all()
-        month = datetime.now().month
-        queryset = queryset.annotate(
-            financed=Coalesce(
-                Sum("constructionfinancing__amount"), 0, output_field=DecimalField(default=0)
-            ),
-            financed_p=Coalesce(
-                F("financed") / F('budget') * 100, 0, output_field=DecimalField(default=0)
-            ),
-            completed=Coalesce(
-                Sum("constructiondailyprogress__amount"),
-                0,
-                output_field=DecimalField(default=0),
-            ),
-            completed_p=Coalesce(
-                F("completed") / NullIf(F('financed'), 0.0) * 100, 0, output_field=DecimalField(default=0)
-            ),
-            p_reviews=Coalesce(
-                Count("review", filter=Q(review__inspection_types=1, review__status='completed',
-                                         review__planned_date__month=month)), 0,
-                output_field=DecimalField(default=0)
-            ),
-            i_reviews=Coalesce(
-                Count("review", filter=Q(review__inspection_types=2) & Q(review__status='completed')), 0,
-                output_field=DecimalField(default=0)
-            ),
-            t_reviews=Coalesce(
-                Count("review", filter=Q(review__inspection_types=3) & Q(review__status='completed')), 0,
-                output_field=DecimalField(default=0)
-            ),
-            last_update=Coalesce(
-                Max("constructiondailyprogress__date"),
-                date(2026, 6, 1),
-            ),
-        ).filter(**filters_map)
+        scope = self.get_scope_q()
+        return queryset if scope is None else queryset.filter(scope)
+
+    def get_queryset(self) -> QuerySet:
+        queryset = object_totals(super().get_queryset())
+        scope = self.get_scope_q()
+        if scope is not None:
+            queryset = queryset.filter(scope)
         return queryset
 
     def get_serializer_class(self):
@@ -156,6 +225,39 @@ class ConstructionsView(AutoRelatedMixin, viewsets.ModelViewSet):
             return ConstructionObjectListSerializer
         return ConstructionObjectSerializer
 
+    @action(detail=False, methods=["get"], url_path="map")
+    def map_layer(self, request):
+        """
+        Objects in `bbox=min_lon,min_lat,max_lon,max_lat` for a map at `zoom`:
+        grid clusters with a status breakdown below zoom 15, bare
+        {id, lat, lon, status, category} points from there on.  Takes the
+        same filters and role scoping as the list; tiles are cached for
+        MAP_TILE_TTL seconds.
+        """
+        params = request.query_params
+        try:
+            bbox = map_clusters.parse_bbox(params)
+            zoom = map_clusters.parse_zoom(params)
+        except map_clusters.MapQueryError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        base = self.get_count_queryset(queryset)
+        if base is None:
+            # filters on annotations: keep the grouped map query off the annotated joins
+            base = ConstructionObject.objects.filter(pk__in=queryset.values("pk"))
+
+        scope_key = "all" if self.get_scope_q() is None else f"{request.user.role}:{request.user.pk}"
+        cache_key = f"{scope_key}:{map_clusters.params_key(params)}"
+        try:
+            data = map_clusters.build_map(base, bbox, zoom, cache_key)
+        except map_clusters.MapQueryError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response(data)
+        patch_cache_control(response, private=True, max_age=map_clusters.tile_ttl())
+        return response
+
     @action(detail=True, methods=["get"])
     def documents(self, request, pk=None, *args, **kwargs):
         queryset = self.get_object().documents.all()
@@ -192,6 +294,11 @@ class ConstructionObjectDocumentsView(viewsets.ModelViewSet):
         "construction",
         "document_type",
     )
+    filter_lookups = {
+        "construction": ["exact", "in"],
+        "document_type": ["exact", "in"],
+        "title": ["icontains"],
+    }
 
 
 class InspectionTypesView(ListAPIView):
@@ -199,7 +306,7 @@ class InspectionTypesView(ListAPIView):
     queryset = InspectionType.objects.all()
 
 
-class InspectionsView(viewsets.ModelViewSet):
+class InspectionsView(ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = BaseReviewSerializer
     queryset = Review.objects.all().select_related(
         "assigned_to",
@@ -207,6 +314,16 @@ class InspectionsView(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter, filters.OrderingFilter)
     filterset_fields = ("object", "assigned_to", 'inspection_types',)
+    filter_lookups = {
+        "object": ["exact", "in"],
+        "assigned_to": ["exact", "in", "isnull"],
+        "inspection_types": ["exact", "in"],
+        "name": ["icontains"],
+        "status": ["exact", "in"],
+        "created_by": ["exact"],
+        "planned_date": ["gte", "lte", "date"],
+        "created_at": ["gte", "lte"],
+    }
 
     def get_queryset(self):
         return (
@@ -237,10 +354,13 @@ class PersonView(viewsets.ModelViewSet):
     queryset = Person.objects.all()
     permission_classes = [IsAuthenticated]
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
+    filter_lookups = {
+        "fullname": ["icontains"],
+    }
     search_fields = ("fullname",)
 
 
-class IssuesView(viewsets.ModelViewSet):
+class IssuesView(ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = IssueSerializer
     queryset = (
         Issue.objects.all()
@@ -253,18 +373,48 @@ class IssuesView(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter, filters.OrderingFilter)
     filterset_fields = ("review", "review__object", "issue_type",)
+    filter_lookups = {
+        "review": ["exact", "in"],
+        "review__object": ["exact", "in"],
+        "issue_type": ["exact", "in"],
+        "object": ["exact", "in"],
+        "title": ["icontains"],
+        "status": ["exact", "in"],
+        "issue_level": ["exact", "in"],
+        "created_by": ["exact"],
+        "resolve_date": ["gte", "lte", "isnull"],
+        "created_at": ["gte", "lte"],
+    }
+    columnar_dictionary_fields = ("status", "issue_level")
+    pagination_class = SwitchablePagination
+    cursor_ordering = ("-created_at", "id")
 
 
 class ReviewListView(generics.ListAPIView):
+    """
+    Planned / in-progress reviews of the current user.
+
+    With `latitude` & `longitude` the reviews carry `distance` (meters) and
+    are sorted nearest first; `radius` additionally keeps only those within
+    that many meters.  Both run in the database: a bounding box on the
+    object's indexed coordinates, then a haversine expression.
+    """
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = (UniversalDRFFilterBackend,)
     filterset_fields = ("object",)
+    filter_lookups = {
+        "object": ["exact", "in"],
+        "status": ["exact", "in"],
+        "planned_date": ["gte", "lte", "date"],
+    }
+    filter_ignore_params = ("latitude", "longitude", "radius")
 
     def get_queryset(self):
         user = self.request.user
         latitude = self.request.query_params.get("latitude")
         longitude = self.request.query_params.get("longitude")
+        radius = self.request.query_params.get("radius")
 
         queryset = (
             Review.objects.filter(
@@ -276,15 +426,22 @@ class ReviewListView(generics.ListAPIView):
                 longitude=F("object__longitude"),
             )
         )
-        #
-        # if latitude and longitude:
-        #     user_location = (float(latitude), float(longitude))
-        #     reviews_in_radius = []
-        #     for review in queryset:
-        #         obj_location = (review.object.latitude, review.object.longitude)
-        #         if geodesic(user_location, obj_location).meters <= 200:
-        #             reviews_in_radius.append(review.id)
-        #     queryset = queryset.filter(id__in=reviews_in_radius)
+
+        if latitude and longitude:
+            try:
+                latitude, longitude = float(latitude), float(longitude)
+                radius = float(radius) if radius else None
+            except ValueError:
+                raise ValidationError({"location": ["latitude, longitude and radius must be numbers"]})
+
+            if radius is not None:
+                queryset = queryset.filter(**geo.bbox_q_kwargs(latitude, longitude, radius, prefix="object__"))
+            queryset = queryset.annotate(
+                distance=geo.haversine_expression(latitude, longitude, "object__latitude", "object__longitude")
+            )
+            if radius is not None:
+                queryset = queryset.filter(distance__lte=radius)
+            queryset = queryset.order_by("distance", "pk")
 
         return queryset
 
@@ -294,7 +451,7 @@ class StartReviewView(APIView):
 
     def post(self, request, review_id):
         try:
-            review = Review.objects.get(id=review_id, assigned_to=request.user)
+            review = Review.objects.select_related("object").get(id=review_id, assigned_to=request.user)
             if review.status != "planned":
                 return Response(
                     {"error": "Review cannot be started"},
@@ -302,17 +459,22 @@ class StartReviewView(APIView):
                 )
 
             # Проверка геолокации
-            # latitude = request.data.get('latitude')
-            # longitude = request.data.get('longitude')
-            #
-            # if latitude and longitude:
-            #     user_location = (float(latitude), float(longitude))
-            #     obj_location = (review.object.latitude, review.object.longitude)
-            #     if geodesic(user_location, obj_location).meters > 200:
-            #         return Response(
-            #             {'error': 'You must be within 200 meters of the object'},
-            #             status=status.HTTP_400_BAD_REQUEST
-            #         )
+            latitude = request.data.get('latitude')
+            longitude = request.data.get('longitude')
+
+            if geo.geofence_enabled() and latitude and longitude:
+                try:
+                    latitude, longitude = float(latitude), float(longitude)
+                except (TypeError, ValueError):
+                    return Response(
+                        {'error': 'Invalid coordinates'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                if not geo.is_inside(review.object, latitude, longitude):
+                    return Response(
+                        {'error': f'You must be within {review.object.radius:g} meters of the object'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
 
             review.status = "in_progress"
             review.save()
@@ -380,6 +542,10 @@ class ProjectCompanyView(viewsets.ModelViewSet):
     serializer_class = ProjectDeveloperCompanySerializer
     queryset = ProjectDeveloperCompany.objects.all()
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
+    filter_lookups = {
+        "name": ["icontains"],
+        "inn": ["exact"],
+    }
     search_fields = ("name", "inn")
     permission_classes = [
         IsAuthenticated,
@@ -390,6 +556,10 @@ class ProjectOwnerCompanyView(viewsets.ModelViewSet):
     serializer_class = ProjectOwnerCompanySerializer
     queryset = ProjectOwnerCompany.objects.all()
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
+    filter_lookups = {
+        "name": ["icontains"],
+        "inn": ["exact"],
+    }
     search_fields = ("name", "inn")
     permission_classes = [
         IsAuthenticated,
@@ -400,6 +570,10 @@ class ConstructionCompanyView(viewsets.ModelViewSet):
     serializer_class = ConstructionCompanySerializer
     queryset = ConstructionCompany.objects.all()
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
+    filter_lookups = {
+        "name": ["icontains"],
+        "inn": ["exact"],
+    }
     search_fields = ("name", "inn")
     permission_classes = [
         IsAuthenticated,
@@ -473,6 +647,11 @@ class IssueActionViewSet(viewsets.ModelViewSet):
     serializer_class = IssueActionSerializer
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
     filterset_fields = ("issue", "created_by")
+    filter_lookups = {
+        "issue": ["exact", "in"],
+        "created_by": ["exact", "in"],
+        "action_type": ["exact", "in"],
+    }
 
 
 class ReviewCommentViewSet(viewsets.ModelViewSet):
@@ -480,6 +659,10 @@ class ReviewCommentViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewCommentSerializer
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
     filterset_fields = ("review", "created_by")
+    filter_lookups = {
+        "review": ["exact", "in"],
+        "created_by": ["exact", "in"],
+    }
 
 
 class NeighborhoodViewSet(viewsets.ModelViewSet):
@@ -487,6 +670,10 @@ class NeighborhoodViewSet(viewsets.ModelViewSet):
     serializer_class = NeighborhoodSerializer
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
     filterset_fields = ("district",)
+    filter_lookups = {
+        "district": ["exact", "in"],
+        "name": ["icontains"],
+    }
 
 
 class DistrictViewSet(viewsets.ModelViewSet):
@@ -494,6 +681,10 @@ class DistrictViewSet(viewsets.ModelViewSet):
     serializer_class = DistrictSerializer
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter, filters.OrderingFilter)
     filterset_fields = ("region",)
+    filter_lookups = {
+        "region": ["exact", "in"],
+        "name": ["icontains"],
+    }
 
 
 class GovernmentProgramViewSet(viewsets.ModelViewSet):
@@ -501,11 +692,32 @@ class GovernmentProgramViewSet(viewsets.ModelViewSet):
     serializer_class = GovernmentProgramSerializer
 
 
-class PublicIssueViewSet(viewsets.ModelViewSet):
+class PublicIssueViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = PublicIssue.objects.all()
     serializer_class = CreatePublicIssueSerializer
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
     filterset_fields = ("construction",)
+    filter_lookups = {
+        "construction": ["exact", "in"],
+        "title": ["icontains"],
+        "issue_level": ["exact", "in"],
+        "resolve_date": ["gte", "lte", "isnull"],
+        "created_at": ["gte", "lte"],
+    }
+    columnar_dictionary_fields = ("issue_level",)
+    pagination_class = SwitchablePagination
+    cursor_ordering = ("-created_at", "id")
+    throttle_classes = [PublicReportThrottle]
+
+    def create(self, request, *args, **kwargs):
+        """Duplicates of an open report are merged into it (200) instead of creating a new one."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        issue, created = dedup.ingest(PublicIssue, serializer.validated_data, create=serializer.save)
+        return Response(
+            self.get_serializer(issue).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
 
 
 class ConstructionFinancingViewSet(
@@ -516,6 +728,11 @@ class ConstructionFinancingViewSet(
     read_serializer_class = ConstructionFinancingSerializer
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
     fieldset_fields = ("construction", "person")
+    filter_lookups = {
+        "construction": ["exact", "in"],
+        "person": ["exact", "in"],
+        "date": ["gte", "lte"],
+    }
 
 
 class ConstructionProgressViewSet(AutoRelatedMixin, viewsets.ModelViewSet):
@@ -523,6 +740,10 @@ class ConstructionProgressViewSet(AutoRelatedMixin, viewsets.ModelViewSet):
     serializer_class = ConstructionDailyProgressSerializer
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
     fieldset_fields = ("construction", "date")
+    filter_lookups = {
+        "construction": ["exact", "in"],
+        "date": ["exact", "gte", "lte"],
+    }
 
 
 class AssignmentViewSet(AutoRelatedMixin, ReadWriteSerializerMixin, viewsets.ModelViewSet):
@@ -531,6 +752,14 @@ class AssignmentViewSet(AutoRelatedMixin, ReadWriteSerializerMixin, viewsets.Mod
     write_serializer_class = CreateAssignmentSerializer
     filter_backends = (UniversalDRFFilterBackend, filters.SearchFilter)
     fieldset_fields = ("object", "deadline")
+    filter_lookups = {
+        "object": ["exact", "in"],
+        "assigned_to": ["exact", "in"],
+        "created_by": ["exact", "in"],
+        "status": ["exact", "in"],
+        "title": ["icontains"],
+        "deadline": ["gte", "lte", "isnull"],
+    }
 
 
 class ReportQueryAPIView(APIView):
@@ -618,105 +847,85 @@ class CalendarViewSet(viewsets.GenericViewSet):
 
     @action(detail=False, methods=['get'])
     def events(self, request):
-        """Get all calendar events for a given date range"""
-        start_date = request.query_params.get('start')
-        end_date = request.query_params.get('end')
+        """
+        Calendar events for `start`..`end` (at most 93 days).
 
+        `types=project_deadline,inspection,issue_resolve` selects layers;
+        `object=`, `district=` and `assigned_to=me|<id>` narrow the scope.
+        """
+        params = request.query_params
         try:
-            start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00')) if start_date else datetime.now()
-            end_date = datetime.fromisoformat(end_date.replace('Z', '+00:00')) if end_date else start_date + timedelta(
-                days=30)
-        except ValueError:
-            return Response(
-                {'error': 'Invalid date format'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            start_date, end_date = calendar_events.parse_range(params)
+            types = calendar_events.parse_types(params)
+            scope = calendar_events.CalendarScope.from_params(params, request.user)
+        except calendar_events.CalendarQueryError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        events = []
+        return Response(calendar_events.build_events(start_date, end_date, types, scope))
 
-        projects = self.get_queryset().filter(
-            deadline__gte=start_date,
-            deadline__lte=end_date
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Per-day counts by event type and status for `start`..`end`, with
+        the same `types` / scope params as `events`.
+        """
+        params = request.query_params
+        try:
+            start_date, end_date = calendar_events.parse_range(params)
+            types = calendar_events.parse_types(params)
+            scope = calendar_events.CalendarScope.from_params(params, request.user)
+        except calendar_events.CalendarQueryError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+            'days': calendar_events.build_summary(start_date, end_date, types, scope),
+        })
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[ORJSONRenderer, BrowsableAPIRenderer, ICalendarRenderer],
+    )
+    def feed(self, request):
+        """
+        Reviews and assignment deadlines assigned to the current user, as
+        JSON or iCalendar (`?format=ics`).
+
+        The response carries `sync_token` (also the ETag).  Passing it back
+        as `?sync_token=` returns only the events changed since, plus the
+        ids still in the feed; an unchanged feed answers 304 Not Modified,
+        as does a matching If-None-Match.  iCalendar is always a full feed.
+        """
+        now = timezone.now()
+        token = calendar_events.SyncToken.current(
+            calendar_events.feed_reviews(request.user, now),
+            calendar_events.feed_assignments(request.user, now),
         )
-        for project in projects:
-            events.append({
-                'id': project.pk,
-                'title': project.name,
-                'start': project.deadline.isoformat(),
-                'end': (project.deadline + timedelta(hours=1)).isoformat(),
-                'type': 'project_deadline',
-                'status': project.status,
-                'project_name': project.name,
-                'color': '#FF6B6B',
-                'extendedProps': {
-                    'project_id': project.pk,
-                    'start_date': project.created_at.isoformat() if project.created_at else None,
-                }
-            })
-
-        # Get inspections
-        inspections = Review.objects.filter(
-            planned_date__gte=start_date,
-            planned_date__lte=end_date
-        ).select_related('object')
-
-        for inspection in inspections:
-            events.append({
-                'id': inspection.pk,
-                'title': inspection.name,
-                'start': inspection.planned_date.isoformat(),
-                'end': (inspection.planned_date + timedelta(hours=2)).isoformat(),
-                'type': 'inspection',
-                'status': inspection.status,
-                'project_name': inspection.object.name,
-                'color': '#4ECDC4',
-                'extendedProps': {
-                    'inspection_id': inspection.pk,
-                    'project_id': inspection.object.pk,
-                    'inspector': inspection.assigned_to.username if inspection.assigned_to else None,
-                    'description': inspection.description
-                }
-            })
-
-        # Get issue resolve dates
-        issues = Issue.objects.filter(
-            resolve_date__gte=start_date,
-            resolve_date__lte=end_date,
-            status__in=['open', 'in_progress']
-        ).select_related('review').prefetch_related('review__object')
-
-        for issue in issues:
-            priority_colors = {
-                'low': '#FFD93D',
-                'medium': '#FF8C42',
-                'high': '#FF6B6B',
-                'critical': '#C92A2A'
-            }
-
-            events.append({
-                'id': issue.pk,
-                'title': issue.title,
-                'start': issue.resolve_date.isoformat(),
-                'end': (issue.resolve_date + timedelta(hours=1)).isoformat(),
-                'type': 'issue_resolve',
-                'status': issue.status,
-                'priority': issue.issue_level,
-                'project_name': issue.review.object.name,
-                'color': priority_colors.get(issue.issue_level, '#FFD93D'),
-                'extendedProps': {
-                    'issue_id': issue.pk,
-                    'project_id': issue.review.object.name,
-                    'assigned_to': issue.review.assigned_to.username if issue.review.assigned_to.username else None,
-                    'description': issue.description
-                }
-            })
+        etag = f'"{token}"'
+
+        since = None
+        if request.query_params.get('sync_token'):
+            try:
+                since = calendar_events.SyncToken.parse(request.query_params['sync_token'])
+            except calendar_events.CalendarQueryError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if since == token or etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
 
-        return Response(events)
+        if request.accepted_renderer.format == ICalendarRenderer.format:
+            since = None
+        feed = calendar_events.build_feed(request.user, token, since, now=now)
+        return Response(feed, headers={'ETag': etag})
 
 
 # views.py
 @api_view(['POST'])
 @permission_classes([AllowAny])  # Allow anonymous
+@throttle_classes([PublicReportThrottle])
 def report_issue(request):
     project_id = request.data.get('project_id')
     reporter_lat = request.data.get('latitude')
@@ -737,18 +946,20 @@ def report_issue(request):
     if project.latitude is None or project.longitude is None:
         return Response({'error': 'Project location not configured'}, status=400)
 
+    try:
+        reporter_lat, reporter_lon = float(reporter_lat), float(reporter_lon)
+    except (TypeError, ValueError):
+        return Response({'error': 'Invalid coordinates'}, status=400)
+
     # Validate location
-    distance = haversine_distance(
-        float(reporter_lat), float(reporter_lon),
-        project.latitude, project.longitude
-    )
+    distance = geo.distance_to(project, reporter_lat, reporter_lon)
 
-    # if distance > project.radius:
-    #     return Response({
-    #         'error': 'You are too far from the object',
-    #         'distance': round(distance, 1),
-    #         'allowed_radius': project.radius
-    #     }, status=403)
+    if geo.geofence_enabled() and distance > project.radius:
+        return Response({
+            'error': 'You are too far from the object',
+            'distance': round(distance, 1),
+            'allowed_radius': project.radius
+        }, status=403)
 
     # Optional OneID integration: if request contains OneID token, verify and link user
     user = None
@@ -757,20 +968,24 @@ def report_issue(request):
         pass
         # user = authenticate_with_oneid(oneid_token)  # Your OneID logic
 
-    issue = Issue.objects.create(
-        object=project,
-        title=title,
-        description=description,
-        status='open',
-        issue_type=issue_type,
-        issue_level=issue_level,
-    )
+    issue, created = dedup.ingest(Issue, {
+        'object': project,
+        'title': title,
+        'description': description,
+        'status': 'open',
+        'issue_type': issue_type,
+        'issue_level': issue_level,
+        'latitude': reporter_lat,
+        'longitude': reporter_lon,
+    })
 
     return Response({
         'id': issue.id,
-        'message': 'Issue reported successfully',
+        'message': 'Issue reported successfully' if created else 'Issue already reported, your report was added to it',
+        'duplicate': not created,
+        'report_count': issue.report_count,
         'distance': round(distance, 1),
-    }, status=201)
+    }, status=201 if created else 200)
 
 class LiveCameraURLView(APIView):
     permission_classes = [IsAuthenticated]  # restrict to your app's authed users
@@ -802,6 +1017,8 @@ class CameraViewSet(viewsets.ModelViewSet):
 class CameraCaptureListView(generics.ListAPIView):
     serializer_class = CameraCaptureSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SwitchablePagination
+    cursor_ordering = ("-captured_at", "id")
 
     def get_queryset(self):
         camera = get_object_or_404(Camera, id=self.kwargs["camera_id"])
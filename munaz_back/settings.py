@@ -169,10 +169,66 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.renderers.ColumnarRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.MainPagination',
-    'PAGE_SIZE': 100
+    'PAGE_SIZE': 100,
+    # Token buckets of api.throttling: <scope>_<ip|device>_<burst|sustained>.
+    # The IP buckets are the hard limit, the device buckets the tighter one.
+    'DEFAULT_THROTTLE_RATES': {
+        'public_report_ip_burst': env.str('PUBLIC_REPORT_IP_BURST_RATE', default='20/min'),
+        'public_report_ip_sustained': env.str('PUBLIC_REPORT_IP_SUSTAINED_RATE', default='120/hour'),
+        'public_report_device_burst': env.str('PUBLIC_REPORT_BURST_RATE', default='5/min'),
+        'public_report_device_sustained': env.str('PUBLIC_REPORT_SUSTAINED_RATE', default='30/hour'),
+    },
 }
 
+# Unindexed text pattern filters (icontains …) are rejected on tables with
+# more rows than this (planner estimate), see api.filters._check_cost.
+FILTER_LARGE_TABLE_ROWS = env.int("FILTER_LARGE_TABLE_ROWS", default=100_000)
+# ?count=estimate returns the planner estimate above this many rows.
+PAGINATION_ESTIMATE_THRESHOLD = env.int("PAGINATION_ESTIMATE_THRESHOLD", default=10_000)
+# Reject issue reports / review starts from outside the object's radius.
+GEOFENCE_ENABLED = env.bool("GEOFENCE_ENABLED", default=True)
+# Seconds a clustered /api/objects/map/ tile stays cached.
+MAP_TILE_TTL = env.int("MAP_TILE_TTL", default=60)
+# Reports on the same object and issue level within this many minutes / meters
+# of an open report are counted on it instead of creating a row (0 disables).
+ISSUE_DEDUP_WINDOW_MINUTES = env.int("ISSUE_DEDUP_WINDOW_MINUTES", default=60)
+ISSUE_DEDUP_RADIUS = env.int("ISSUE_DEDUP_RADIUS", default=50)
+# websocket.workers DB listener: bounded queue shared by a pool of consumers
+# that forward events in per-table batches collected over BATCH_WINDOW seconds.
+REALTIME_QUEUE_SIZE = env.int("REALTIME_QUEUE_SIZE", default=10_000)
+REALTIME_CONSUMERS = env.int("REALTIME_CONSUMERS", default=4)
+REALTIME_BATCH_WINDOW = env.float("REALTIME_BATCH_WINDOW", default=0.05)
+REALTIME_BATCH_SIZE = env.int("REALTIME_BATCH_SIZE", default=500)
+# Repeated changes of one row within this many seconds reach clients as one event.
+REALTIME_COALESCE_WINDOW = env.float("REALTIME_COALESCE_WINDOW", default=0.25)
+# Listener stats log interval, and the window of `manage.py realtime_metrics` latencies.
+REALTIME_STATS_INTERVAL = env.int("REALTIME_STATS_INTERVAL", default=60)
+# Events kept per table for clients resuming with ?last_event_id= (0 disables event ids and replay).
+REALTIME_REPLAY_SIZE = env.int("REALTIME_REPLAY_SIZE", default=10_000)
+# Resuming clients that missed more events than this get RESYNC instead of a replay.
+REALTIME_REPLAY_LIMIT = env.int("REALTIME_REPLAY_LIMIT", default=1000)
+REALTIME_REDIS_URL = env.str("REALTIME_REDIS_URL", default="redis://localhost:6379/0")
+# Standby listener replicas retry the leader lock, and the active one checks its
+# connection and publishes its status, every this many seconds.
+REALTIME_LEADER_CHECK = env.float("REALTIME_LEADER_CHECK", default=2)
+# Change capture of python -m websocket.workers: "notify" (triggers + LISTEN) or
+# "replication" (wal2json logical replication slot, no triggers, at-least-once).
+REALTIME_BACKEND = env.str("REALTIME_BACKEND", default="notify")
+REALTIME_REPLICATION_SLOT = env.str("REALTIME_REPLICATION_SLOT", default="realtime")
+REALTIME_REPLICATION_POLL = env.float("REALTIME_REPLICATION_POLL", default=0.2)
+REALTIME_REPLICATION_BATCH = env.int("REALTIME_REPLICATION_BATCH", default=1000)
+
 
 DATA_UPLOAD_MAX_MEMORY_SIZE = 262144000
 
@@ -198,6 +254,14 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared by all workers, so throttle buckets and cached tiles hold process-wide.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env.str('REDIS_CACHE_URL', default='redis://localhost:6379/1'),
+    },
+}
+
 
 UNFOLD = {
     "SITE_TITLE": "Qurilish Nazorati Platformasi",
@@ -1,7 +1,13 @@
 import json
+from urllib.parse import parse_qs
 
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from websocket import replay
+from websocket.router import BINARY_SUBPROTOCOL, encode_event
+from websocket.subscriptions import Subscription, SubscriptionError, dispatcher, subscription_filters
+
 
 class PrintConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -48,35 +54,69 @@ class PrintConsumer(AsyncWebsocketConsumer):
 
 
 class RealtimeConsumer(AsyncWebsocketConsumer):
+    """
+    Changes of one table, narrowed by query string filters and the user's
+    role scope, see websocket/subscriptions.py.  `?last_event_id=` resumes
+    after a dropped connection, see websocket/replay.py.
+    """
+    subscription = None
+    # live frames held back while missed events are replayed
+    held = None
+
     async def connect(self):
         if not self.scope['user'].is_authenticated:
             await self.close()
             return
 
         self.table = self.scope["url_route"]["kwargs"]["table"]
-        self.group_name = f"realtime_{self.table}"
+        params = parse_qs(self.scope.get("query_string", b"").decode())
+        last_event_id = params.pop("last_event_id", [None])[0]
+        try:
+            filters = await database_sync_to_async(subscription_filters)(self.scope["user"], self.table, params)
+        except SubscriptionError:
+            await self.close(code=4400)
+            return
 
-        await self.channel_layer.group_add(
-            self.group_name,
-            self.channel_name
-        )
+        # frames arrive pre-encoded in both forms, clients pick one on connect
+        self.binary = BINARY_SUBPROTOCOL in self.scope.get("subprotocols", [])
+        await self.accept(subprotocol=BINARY_SUBPROTOCOL if self.binary else None)
 
-        await self.accept()
+        self.subscription = Subscription(self, filters)
+        if last_event_id:
+            self.held = []
+        await dispatcher.subscribe(self.table, self.subscription)
+        if last_event_id:
+            await self.replay(last_event_id)
 
     async def disconnect(self, close_code):
-        self.table = self.scope["url_route"]["kwargs"]["table"]
-
-        self.group_name = f"realtime_{self.table}"
-        await self.channel_layer.group_discard(
-            self.group_name,
-            self.channel_name
-        )
-
-    async def db_event(self, event):
-        payload = event["payload"]
-
-        await self.send(text_data=json.dumps({
-            "eventType": payload["action"],
-            "pk": (payload.get("old_record", {}) or payload.get("record", {})).get("id", None),
-            "new_record": payload["record"],
-        }))
+        if self.subscription is not None:
+            await dispatcher.unsubscribe(self.table, self.subscription)
+
+    async def replay(self, last_event_id: str):
+        """Send the events missed since `last_event_id`, or RESYNC when they are gone."""
+        events = await replay.missed(self.table, last_event_id)
+        if events is None:
+            await self.write_frame(encode_event({"action": "RESYNC", "reason": "replay_gap"}))
+        else:
+            for event_id, payload in events:
+                if self.subscription.matches(payload.get("scope")):
+                    await self.write_frame(encode_event(payload, event_id))
+            last_event_id = events[-1][0] if events else last_event_id
+
+        # live events that arrived meanwhile, minus the ones already replayed
+        held, self.held = self.held, None
+        for frame in held:
+            if events is None or frame["id"] is None or replay.event_key(frame["id"]) > replay.event_key(last_event_id):
+                await self.write_frame(frame)
+
+    async def send_frame(self, frame: dict):
+        if self.held is not None:
+            self.held.append(frame)
+        else:
+            await self.write_frame(frame)
+
+    async def write_frame(self, frame: dict):
+        if self.binary:
+            await self.send(bytes_data=frame["bytes"])
+        else:
+            await self.send(text_data=frame["text"])
@@ -0,0 +1,131 @@
+"""
+Row hydration for ID-only NOTIFY payloads.
+
+With `create_realtime_triggers --payload ids` (or `batch`) the triggers
+send just `table`, `action` and the ids, which keeps NOTIFY under
+PostgreSQL's 8000-byte limit for wide rows.  The listener then loads the rows of each table with
+one `pk IN (...)` query per batch and renders them with the serializer of
+the REST list endpoint, so websocket clients get the same shape as REST
+(media URLs stay relative, there is no request to build them from).
+
+The same batch query pass also resolves every row's scope — its object,
+district, companies and assignee — which the websocket servers match
+against filtered subscriptions (see websocket/subscriptions.py).
+"""
+from django.apps import apps
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from api.fast_serializers import UnsupportedSerializer, ValuesPlan
+
+# model label -> (list serializer, optional queryset hook adding the list's annotations)
+REALTIME_SERIALIZERS = {
+    "api.ConstructionObject": ("api.serializers.ConstructionObjectListSerializer", "api.views.object_totals"),
+    "api.Review": ("api.serializers.ReviewListSerializer", None),
+    "api.Report": ("api.serializers.ReportSerializer", None),
+    "api.Issue": ("api.serializers.IssueSerializer", None),
+    "api.PublicIssue": ("api.serializers.CreatePublicIssueSerializer", None),
+}
+
+# scope attribute -> lookup from ConstructionObject
+OBJECT_SCOPE = {
+    "object_id": "pk",
+    "district": "neighborhood__district",
+    "construction_company": "construction_companies",
+    "project_company": "project_companies",
+    "owner_company": "owner_companies",
+}
+
+# model label -> (path to its ConstructionObject, assignee lookup,
+#                 attribute -> column giving the scope of a deleted row)
+REALTIME_SCOPES = {
+    "api.ConstructionObject": ("", None, {"object_id": "id"}),
+    "api.Review": ("object__", "assigned_to", {"object_id": "object_id", "assigned_to": "assigned_to_id"}),
+    "api.Report": ("review__object__", "review__assigned_to", {}),
+    "api.Issue": ("object__", None, {"object_id": "object_id"}),
+    "api.PublicIssue": ("construction__", None, {"object_id": "construction_id"}),
+}
+
+_tables: dict = {}
+
+
+def realtime_tables() -> dict:
+    """{db table: model} of the realtime-enabled models."""
+    if not _tables:
+        for model in apps.get_models():
+            if getattr(model, "realtime", False):
+                _tables[model._meta.db_table] = model
+    return _tables
+
+
+def realtime_model(table: str):
+    """Realtime-enabled model stored in `table`, None for other tables."""
+    return realtime_tables().get(table)
+
+
+def hydrate_rows(table: str, ids) -> dict:
+    """{pk: serialized row} for the rows of `ids` that still exist."""
+    model = realtime_model(table)
+    if model is None or model._meta.label not in REALTIME_SERIALIZERS:
+        return {}
+    serializer_path, queryset_hook = REALTIME_SERIALIZERS[model._meta.label]
+    serializer = import_string(serializer_path)()
+
+    # the worker is long-lived, don't reuse a connection the server has dropped
+    close_old_connections()
+    queryset = model._default_manager.filter(pk__in=list(ids))
+    if queryset_hook:
+        queryset = import_string(queryset_hook)(queryset)
+
+    try:
+        plan = ValuesPlan(serializer, model, annotations=queryset.query.annotations.keys())
+    except UnsupportedSerializer:
+        objects = list(queryset)
+        return {obj.pk: data for obj, data in zip(objects, type(serializer)(objects, many=True).data)}
+    rows = list(plan.values(queryset))
+    return {row[plan.pk_name]: data for row, data in zip(rows, plan.serialize(rows))}
+
+
+def scope_lookups(model) -> dict:
+    """{scope attribute: lookup} of a realtime model, empty for models without scope."""
+    if model is None or model._meta.label not in REALTIME_SCOPES:
+        return {}
+    prefix, assignee, _ = REALTIME_SCOPES[model._meta.label]
+    lookups = {attr: f"{prefix}{lookup}" for attr, lookup in OBJECT_SCOPE.items()}
+    if assignee:
+        lookups["assigned_to"] = assignee
+    return lookups
+
+
+def row_scopes(table: str, ids) -> dict:
+    """{pk: {attribute: [values]}} for the rows of `ids` that still exist, one query."""
+    model = realtime_model(table)
+    lookups = scope_lookups(model)
+    if not lookups:
+        return {}
+
+    close_old_connections()
+    scopes: dict = {}
+    rows = model._default_manager.filter(pk__in=list(ids)).values_list("pk", *lookups.values())
+    for pk, *values in rows:
+        scope = scopes.setdefault(pk, {attr: set() for attr in lookups})
+        for attr, value in zip(lookups, values):
+            if value is not None:
+                scope[attr].add(value)
+    return {pk: {attr: sorted(values) for attr, values in scope.items()} for pk, scope in scopes.items()}
+
+
+def deleted_scope(table: str, old_record: dict) -> dict:
+    """
+    Scope of a row that is gone, from the columns of its last state.  Other
+    attributes stay unknown and match every subscriber, the frame of a
+    deleted row carries nothing but its pk.
+    """
+    model = realtime_model(table)
+    if model is None or model._meta.label not in REALTIME_SCOPES:
+        return {}
+    columns = REALTIME_SCOPES[model._meta.label][2]
+    return {
+        attr: [] if old_record[column] is None else [old_record[column]]
+        for attr, column in columns.items() if column in old_record
+    }
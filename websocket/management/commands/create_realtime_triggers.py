@@ -2,15 +2,116 @@ from django.core.management.base import BaseCommand
 from django.apps import apps
 from django.db import connection
 
+# trigger functions, (re)created by every run (0001/0003 migrations create the first two
+# too, without the `ts` the realtime metrics measure latency from)
+FUNCTIONS = {
+    "notify_table_changes": """
+    CREATE OR REPLACE FUNCTION notify_table_changes()
+    RETURNS trigger AS $$
+    DECLARE
+        payload json;
+    BEGIN
+        payload = json_build_object(
+            'table', TG_TABLE_NAME,
+            'action', TG_OP,
+            'record', row_to_json(NEW),
+            'old_record', row_to_json(OLD),
+            'schema', TG_TABLE_SCHEMA,
+            'ts', extract(epoch FROM clock_timestamp())
+        );
+
+        PERFORM pg_notify('db_changes', payload::text);
+
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    "notify_table_changes_ids": """
+    CREATE OR REPLACE FUNCTION notify_table_changes_ids()
+    RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('db_changes', json_build_object(
+            'table', TG_TABLE_NAME,
+            'action', TG_OP,
+            'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+            'schema', TG_TABLE_SCHEMA,
+            'ts', extract(epoch FROM clock_timestamp())
+        )::text);
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    # one NOTIFY per 500 rows of a statement, which keeps it under the 8000-byte limit
+    "notify_table_changes_batch": """
+    CREATE OR REPLACE FUNCTION notify_table_changes_batch()
+    RETURNS trigger AS $$
+    DECLARE
+        ids json;
+    BEGIN
+        -- only one of the transition tables exists for INSERT / DELETE, hence EXECUTE
+        FOR ids IN EXECUTE format(
+            'SELECT json_agg(id) FROM ('
+            '    SELECT id, (row_number() OVER () - 1) / 500 AS chunk FROM %I'
+            ') AS numbered GROUP BY chunk',
+            CASE WHEN TG_OP = 'DELETE' THEN 'old_rows' ELSE 'new_rows' END
+        )
+        LOOP
+            PERFORM pg_notify('db_changes', json_build_object(
+                'table', TG_TABLE_NAME,
+                'action', TG_OP,
+                'ids', ids,
+                'schema', TG_TABLE_SCHEMA,
+                'ts', extract(epoch FROM clock_timestamp())
+            )::text);
+        END LOOP;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+}
+
+# --payload mode -> trigger function, and whether it fires once per statement
+PAYLOAD_MODES = {
+    "full": ("notify_table_changes", False),
+    "ids": ("notify_table_changes_ids", False),
+    "batch": ("notify_table_changes_batch", True),
+}
+
+# statement triggers with transition tables take a single event each
+STATEMENT_TRIGGERS = {
+    "insert": ("INSERT", "NEW TABLE AS new_rows"),
+    "update": ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+    "delete": ("DELETE", "OLD TABLE AS old_rows"),
+}
+
 
 class Command(BaseCommand):
     help = "Create PostgreSQL triggers for realtime-enabled models"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--payload", choices=PAYLOAD_MODES, default="full",
+            help="full: NOTIFY carries the whole row; ids: only table/action/id, "
+                 "the listener loads the rows (no 8000-byte NOTIFY limit); "
+                 "batch: one NOTIFY with an ids array per statement (bulk writes)",
+        )
+        parser.add_argument(
+            "--drop", action="store_true",
+            help="only drop the realtime triggers (REALTIME_BACKEND=replication needs none)",
+        )
+
     def handle(self, *args, **options):
         cursor = connection.cursor()
+        function, per_statement = PAYLOAD_MODES[options["payload"]]
         created = 0
+        dropped = 0
         skipped = 0
 
+        for sql in FUNCTIONS.values():
+            cursor.execute(sql)
+
         for model in apps.get_models():
             meta = model._meta
 
@@ -27,24 +128,41 @@ class Command(BaseCommand):
 
             self.stdout.write(f"⏳ Processing {table}")
 
+            # recreated so re-running with another --payload switches the mode;
+            # `<table>_notify` from migration 0002 is replaced so a change notifies once
             cursor.execute(f"""
-            DO $$
-            BEGIN
-                IF NOT EXISTS (
-                    SELECT 1 FROM pg_trigger WHERE tgname = '{trigger_name}'
-                ) THEN
-                    CREATE TRIGGER {trigger_name}
-                    AFTER INSERT OR UPDATE OR DELETE
+            DROP TRIGGER IF EXISTS {table}_notify ON {table};
+            DROP TRIGGER IF EXISTS {trigger_name} ON {table};
+            """ + "".join(
+                f"DROP TRIGGER IF EXISTS {table}_realtime_{suffix} ON {table};\n"
+                for suffix in STATEMENT_TRIGGERS
+            ))
+
+            if options["drop"]:
+                dropped += 1
+                continue
+
+            if per_statement:
+                for suffix, (event, referencing) in STATEMENT_TRIGGERS.items():
+                    cursor.execute(f"""
+                    CREATE TRIGGER {table}_realtime_{suffix}
+                    AFTER {event}
                     ON {table}
-                    FOR EACH ROW
-                    EXECUTE FUNCTION notify_table_changes();
-                END IF;
-            END;
-            $$;
-            """)
+                    REFERENCING {referencing}
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION {function}();
+                    """)
+            else:
+                cursor.execute(f"""
+                CREATE TRIGGER {trigger_name}
+                AFTER INSERT OR UPDATE OR DELETE
+                ON {table}
+                FOR EACH ROW
+                EXECUTE FUNCTION {function}();
+                """)
 
             created += 1
 
         self.stdout.write(self.style.SUCCESS(
-            f"Done. Created/verified: {created}, skipped: {skipped}"
+            f"Done. Created/verified: {created}, dropped: {dropped}, skipped: {skipped}"
         ))
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+from websocket.workers.leader import read_status
+
+
+class Command(BaseCommand):
+    help = "Show the DB listener replicas, which one is active and their stats"
+
+    def handle(self, *args, **options):
+        statuses = asyncio.run(read_status())
+        if not statuses:
+            self.stdout.write(self.style.WARNING("No DB listener replica is running"))
+            return
+
+        now = time.time()
+        for replica, status in sorted(statuses.items(), key=lambda item: item[1]["state"] != "active"):
+            state = status["state"]
+            style = self.style.SUCCESS if state == "active" else self.style.NOTICE
+            self.stdout.write(style(
+                f"{replica}: {state} for {now - status['state_since']:.0f}s, "
+                f"last seen {now - status['heartbeat']:.0f}s ago"
+            ))
+            self.stdout.write(
+                f"  queue {status['queue_depth']}/{status['queue_capacity']}, pending {status['pending']}, "
+                f"lag {status['lag']}s (max {status['max_lag']}s), received {status['received']}, "
+                f"forwarded {status['forwarded']}, dropped {status['dropped']}, "
+                f"coalesced {status['coalesced']}, resyncs {status['resyncs']}"
+            )
+
+        active = sum(status["state"] == "active" for status in statuses.values())
+        if active != 1:
+            self.stdout.write(self.style.ERROR(f"{active} active replicas, expected 1"))
@@ -0,0 +1,62 @@
+import asyncio
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from websocket import metrics
+from websocket.workers.leader import read_status
+
+PERCENTILES = (50, 95, 99)
+
+
+def format_ms(value) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+class Command(BaseCommand):
+    help = "Report realtime latency percentiles, per-table event counters and subscribers per group"
+
+    def handle(self, *args, **options):
+        listeners, servers = asyncio.run(self.collect())
+
+        histograms = defaultdict(list)
+        for status in [*listeners.values(), *servers.values()]:
+            for stage, counts in status.get("latency", {}).items():
+                histograms[stage].append(counts)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Latency in ms, last {metrics.stats_interval()}s window (bucket upper bounds)"
+        ))
+        self.stdout.write(f"  {'stage':<18}{'events':>8}" + "".join(f"{'p%d' % p:>10}" for p in PERCENTILES))
+        for stage in metrics.STAGES:
+            counts = metrics.merge(histograms[stage])
+            self.stdout.write(
+                f"  {stage:<18}{sum(counts):>8}"
+                + "".join(f"{format_ms(metrics.percentile(counts, p)):>10}" for p in PERCENTILES)
+            )
+
+        tables = defaultdict(lambda: defaultdict(int))
+        for status in [*listeners.values(), *servers.values()]:
+            for table, counters in status.get("tables", {}).items():
+                for name, value in counters.items():
+                    tables[table][name] += value
+
+        columns = ("in", "out", "dropped", "coalesced", "delivered", "sent", "lost")
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            "Events per table (listener: in/out/dropped/coalesced, websocket servers: delivered/sent/lost)"
+        ))
+        self.stdout.write(f"  {'table':<24}" + "".join(f"{name:>11}" for name in columns))
+        for table, counters in sorted(tables.items()):
+            self.stdout.write(f"  {table:<24}" + "".join(f"{counters[name]:>11}" for name in columns))
+
+        groups = defaultdict(int)
+        for status in servers.values():
+            for group, subscribers in status.get("groups", {}).items():
+                groups[group] += subscribers
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Subscribers per group ({len(servers)} websocket servers)"))
+        for group, subscribers in sorted(groups.items()):
+            self.stdout.write(f"  {group:<34}{subscribers:>6}")
+
+    async def collect(self):
+        return await read_status(), await metrics.read()
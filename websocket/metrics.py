@@ -0,0 +1,99 @@
+"""
+Latency and throughput metrics of the realtime pipeline.
+
+Events carry wall-clock timestamps of their stages: `ts` from the trigger
+(`clock_timestamp()`, the commit time with the replication backend),
+`ts_listener` when the listener queued them, and the router stamps the
+group_send time on every frame.  The listener records
+
+    trigger_listener   ts -> ts_listener
+    listener_send      ts_listener -> group_send (coalescing, hydration)
+
+and the dispatcher of each websocket server, once it has written a frame
+to its subscribers,
+
+    send_consumer      group_send -> frames written
+    end_to_end         ts (or ts_listener) -> frames written
+
+Stages that span the database and the app servers include their clock
+skew.  Latencies go to histograms with ×1.25 buckets, which merge across
+processes.  Every process keeps the histograms of its last complete
+REALTIME_STATS_INTERVAL window; `manage.py realtime_metrics` merges them
+with the per-table counters and the subscribers per group.
+"""
+import json
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from websocket.replay import client
+
+STAGES = ("trigger_listener", "listener_send", "send_consumer", "end_to_end")
+METRICS_KEY = "realtime:metrics"
+
+# bucket upper bounds in milliseconds, 0.5 ms to about two minutes
+BUCKETS = tuple(0.5 * 1.25 ** i for i in range(57))
+
+
+def stats_interval() -> int:
+    return getattr(settings, "REALTIME_STATS_INTERVAL", 60)
+
+
+def percentile(counts: list, p: float) -> float | None:
+    """Upper bound, in ms, of the bucket holding the p-th percentile; None without samples."""
+    total = sum(counts)
+    if not total:
+        return None
+    rank = p / 100 * total
+    seen = 0
+    for i, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+    return float("inf")
+
+
+def merge(histograms) -> list:
+    merged = [0] * (len(BUCKETS) + 1)
+    for counts in histograms:
+        for i, count in enumerate(counts):
+            merged[i] += count
+    return merged
+
+
+class Latencies:
+    """Per-stage histograms of the current window."""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, stage: str, start: float | None, end: float | None):
+        if start is None or end is None:
+            return
+        counts = self.histograms.setdefault(stage, [0] * (len(BUCKETS) + 1))
+        counts[bisect_left(BUCKETS, max(end - start, 0) * 1000)] += 1
+
+    def take(self) -> dict:
+        """{stage: bucket counts} of the window, starting a new one."""
+        histograms, self.histograms = self.histograms, {}
+        return histograms
+
+
+async def publish(name: str, metrics: dict):
+    await client().hset(METRICS_KEY, name, json.dumps({**metrics, "published": time.time()}))
+
+
+async def read() -> dict:
+    """{process: metrics} of the websocket servers; servers silent for 3 intervals are dropped."""
+    metrics = {}
+    stale = []
+    for name, value in (await client().hgetall(METRICS_KEY)).items():
+        data = json.loads(value)
+        if time.time() - data["published"] > 3 * stats_interval():
+            stale.append(name)
+        else:
+            metrics[name.decode()] = data
+    if stale:
+        await client().hdel(METRICS_KEY, *stale)
+    return metrics
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+SQL = """
+CREATE OR REPLACE FUNCTION notify_table_changes_ids()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('db_changes', json_build_object(
+        'table', TG_TABLE_NAME,
+        'action', TG_OP,
+        'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+        'schema', TG_TABLE_SCHEMA
+    )::text);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+REVERSE_SQL = "DROP FUNCTION IF EXISTS notify_table_changes_ids();"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("websocket", "0002_auto_triggers"),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL, REVERSE_SQL),
+    ]
@@ -0,0 +1,82 @@
+"""
+Replay buffer of realtime events.
+
+Every event the listener routes is appended to a Redis stream per table,
+capped at about REALTIME_REPLAY_SIZE entries.  The stream entry id
+(`<ms>-<seq>`, increasing within the table) is the event id clients see
+as `eventId`.  A client reconnecting with `?last_event_id=<id>` gets the
+events it missed replayed, as long as its last event is still in the
+stream and it missed at most REALTIME_REPLAY_LIMIT of them; otherwise it
+gets a RESYNC and reloads through REST.
+
+Entries keep the routed payload (record and scope), frames of replayed
+events are encoded per reconnecting client.
+"""
+import re
+
+import msgpack
+import redis.asyncio as redis
+from django.conf import settings
+from redis.exceptions import ResponseError
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_PREFIX = "realtime:events:"
+EVENT_ID_RE = re.compile(r"^\d+-\d+$")
+
+_encoder = JSONEncoder()
+_client = None
+
+
+def replay_size() -> int:
+    return getattr(settings, "REALTIME_REPLAY_SIZE", 10_000)
+
+
+def replay_limit() -> int:
+    return getattr(settings, "REALTIME_REPLAY_LIMIT", 1000)
+
+
+def client():
+    global _client
+    if _client is None:
+        _client = redis.from_url(getattr(settings, "REALTIME_REDIS_URL", "redis://localhost:6379/0"))
+    return _client
+
+
+def event_key(event_id: str) -> tuple:
+    """Sort key of an event id."""
+    ms, seq = event_id.split("-")
+    return int(ms), int(seq)
+
+
+async def append(table: str, payloads: list[dict]) -> list:
+    """Store `payloads` and return their event ids, all None with the buffer disabled."""
+    size = replay_size()
+    if not size:
+        return [None] * len(payloads)
+    async with client().pipeline(transaction=False) as pipe:
+        for payload in payloads:
+            pipe.xadd(
+                f"{STREAM_PREFIX}{table}",
+                {"payload": msgpack.packb(payload, default=_encoder.default)},
+                maxlen=size,
+                approximate=True,
+            )
+        return [event_id.decode() for event_id in await pipe.execute()]
+
+
+async def missed(table: str, last_event_id: str) -> list | None:
+    """
+    [(event id, payload)] of the events after `last_event_id`, None when they
+    can't be replayed: the id is unknown or trimmed, or too many were missed.
+    """
+    if not replay_size() or not EVENT_ID_RE.match(last_event_id):
+        return None
+    limit = replay_limit()
+    try:
+        # starts at the client's last event, which proves nothing before it was trimmed
+        entries = await client().xrange(f"{STREAM_PREFIX}{table}", min=last_event_id, count=limit + 2)
+    except ResponseError:
+        return None
+    if not entries or entries[0][0].decode() != last_event_id or len(entries) > limit + 1:
+        return None
+    return [(event_id.decode(), msgpack.unpackb(fields[b"payload"])) for event_id, fields in entries[1:]]
@@ -1,12 +1,122 @@
+"""
+Fan-out of database events to the `realtime_<table>` groups.
+
+Every event is turned into its websocket frame and encoded here, once,
+both as JSON text and as msgpack for clients that negotiate the `msgpack`
+subprotocol.  Consumers forward the ready frames as they are, so the cost
+of an event no longer grows with the number of connected clients.
+
+Messages also carry each event's row `scope` (None for RESYNC), which the
+per-process dispatcher matches against subscriptions.  Events are stored
+in the replay buffer (websocket/replay.py) before they are sent, which
+gives them their `eventId`.
+
+For monitoring (websocket/metrics.py) frames carry the event's start time
+and the group_send time, and messages a per-table sequence number of their
+first event: the dispatchers count gaps as events the channel layer
+dropped (capacity, expiry).
+"""
+import time
+from collections import defaultdict
+
+import msgpack
+import orjson
 from channels.layers import get_channel_layer
+from rest_framework.utils.encoders import JSONEncoder
+
+from websocket import replay
+from websocket.workers.leader import replica_name
+
+BINARY_SUBPROTOCOL = "msgpack"
+
+_encoder = JSONEncoder()
+
+# sender of the sequence numbers, they restart with the listener
+ORIGIN = replica_name()
+_sequences: dict = defaultdict(int)
+
+
+def next_sequence(table: str, count: int) -> int:
+    """First of `count` sequence numbers of `table`."""
+    first = _sequences[table] + 1
+    _sequences[table] += count
+    return first
+
+
+def stamp(payloads: list[dict], frames: list[dict]):
+    """Mark the frames and payloads as sent now."""
+    sent = time.time()
+    for payload, frame in zip(payloads, frames):
+        payload["ts_send"] = sent
+        frame["timing"] = [payload.get("ts") or payload.get("ts_listener"), sent]
+
+
+def event_frame(payload: dict) -> dict:
+    if payload["action"] == "RESYNC":
+        # the listener dropped events of this table, clients should reload it
+        return {"eventType": "RESYNC", "reason": payload.get("reason"), "dropped": payload.get("dropped")}
+    frame = {
+        "eventType": payload["action"],
+        "pk": (payload.get("old_record", {}) or payload.get("record", {})).get("id", None),
+        "new_record": payload["record"],
+    }
+    if "first_action" in payload:
+        # several changes of the row were coalesced into this one
+        frame["firstEventType"] = payload["first_action"]
+        frame["coalesced"] = payload["coalesced"]
+    return frame
+
+
+def encode_event(payload: dict, event_id: str | None = None) -> dict:
+    """The event's frame as JSON text and as msgpack bytes."""
+    frame = event_frame(payload)
+    if event_id is not None:
+        frame["eventId"] = event_id
+    return {
+        "id": event_id,
+        "text": orjson.dumps(frame, default=_encoder.default).decode(),
+        "bytes": msgpack.packb(frame, default=_encoder.default),
+    }
+
 
 async def route_db_event(payload: dict):
     channel_layer = get_channel_layer()
+    [event_id] = await replay.append(payload["table"], [payload])
+    frame = encode_event(payload, event_id)
+    stamp([payload], [frame])
 
     await channel_layer.group_send(
         f"realtime_{payload['table']}",
         {
             "type": "db.event",
-            "payload": payload,
+            "table": payload["table"],
+            "origin": ORIGIN,
+            "seq": next_sequence(payload["table"], 1),
+            "frame": frame,
+            "scope": payload.get("scope"),
+        }
+    )
+
+
+async def route_db_events(table: str, payloads: list[dict]):
+    """Forward a batch of events of one table with a single group_send."""
+    if len(payloads) == 1:
+        await route_db_event(payloads[0])
+        return
+
+    channel_layer = get_channel_layer()
+    event_ids = await replay.append(table, payloads)
+    frames = [encode_event(payload, event_id) for payload, event_id in zip(payloads, event_ids)]
+    stamp(payloads, frames)
+
+    await channel_layer.group_send(
+        f"realtime_{table}",
+        {
+            "type": "db.events",
+            "table": table,
+            "origin": ORIGIN,
+            "seq": next_sequence(table, len(payloads)),
+            "frames": frames,
+            "scopes": [payload.get("scope") for payload in payloads],
         }
     )
@@ -0,0 +1,262 @@
+"""
+Filtered realtime subscriptions.
+
+A subscription is a set of allowed values per scope attribute (see
+websocket/hydration.py): the client's own filters from the query string,
+`?object_id=1,2&district=3&assigned_to=me`, intersected with the role
+scoping of the objects list (`api.views.role_filters`).  An event reaches a
+subscription when, for every filtered attribute, its row has one of the
+allowed values; attributes the event doesn't know (deleted rows) match.
+
+Each websocket server process runs one `Dispatcher`.  It alone is a member
+of the `realtime_<table>` groups of the tables its clients watch, so the
+channel layer delivers an event once per process instead of once per
+client.  The dispatcher then looks the event up in a per-table
+`SubscriptionIndex`: every subscription is indexed under the values of one
+of its filters, so only subscriptions that can match are checked.
+
+Dispatchers also measure the last stages of the pipeline latency, count
+events per table (delivered to the process, frames sent, lost in the
+channel layer) and publish them with their subscriber counts, see
+websocket/metrics.py.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from channels.layers import get_channel_layer
+
+from websocket import metrics
+from websocket.hydration import realtime_model, scope_lookups
+from websocket.workers.leader import replica_name
+
+log = logging.getLogger("realtime_subscriptions")
+
+# attributes a subscription is indexed under, most selective first
+INDEX_ORDER = ("object_id", "assigned_to", "district", "construction_company", "project_company", "owner_company")
+
+# api.views.role_filters lookup -> scope attribute
+ROLE_ATTRIBUTES = {
+    "neighborhood__district__in": "district",
+    "construction_companies__in": "construction_company",
+    "project_companies__in": "project_company",
+    "owner_companies__in": "owner_company",
+}
+
+# channels_redis forgets group members after a day, re-join well before that
+GROUP_REFRESH = 3600
+
+
+class SubscriptionError(ValueError):
+    pass
+
+
+def subscription_filters(user, table: str, params: dict) -> dict:
+    """
+    {attribute: frozenset of allowed values} for `user` watching `table`,
+    from query string `params` (as parsed by `parse_qs`) and the user's role.
+    """
+    # imported here, api.views pulls in the whole REST layer
+    from api.views import role_filters
+
+    lookups = scope_lookups(realtime_model(table))
+    if not lookups:
+        raise SubscriptionError(f"{table} has no realtime events")
+
+    filters = {}
+    for attr, values in params.items():
+        if attr not in lookups:
+            raise SubscriptionError(f"Unknown filter: {attr}")
+        allowed = set()
+        for value in ",".join(values).split(","):
+            if attr == "assigned_to" and value == "me":
+                allowed.add(user.pk)
+                continue
+            try:
+                allowed.add(int(value))
+            except ValueError:
+                raise SubscriptionError(f"{attr} must be a list of ids") from None
+        filters[attr] = frozenset(allowed)
+
+    for lookup, queryset in role_filters(user).items():
+        attr = ROLE_ATTRIBUTES[lookup]
+        scoped = frozenset(queryset.values_list("pk", flat=True))
+        filters[attr] = filters[attr] & scoped if attr in filters else scoped
+    return filters
+
+
+class Subscription:
+    __slots__ = ("consumer", "filters")
+
+    def __init__(self, consumer, filters: dict):
+        self.consumer = consumer
+        self.filters = filters
+
+    @property
+    def anchor(self) -> str | None:
+        return next((attr for attr in INDEX_ORDER if attr in self.filters), None)
+
+    def matches(self, scope: dict | None) -> bool:
+        if scope is None:
+            return True
+        for attr, allowed in self.filters.items():
+            values = scope.get(attr)
+            if values is not None and allowed.isdisjoint(values):
+                return False
+        return True
+
+
+class SubscriptionIndex:
+    def __init__(self):
+        self.subscriptions: set = set()
+        self.unfiltered: set = set()
+        # attribute -> subscriptions indexed under it; (attribute, value) -> subscriptions
+        self.anchored: dict = defaultdict(set)
+        self.by_value: dict = defaultdict(set)
+
+    def __len__(self):
+        return len(self.subscriptions)
+
+    def add(self, subscription: Subscription):
+        self.subscriptions.add(subscription)
+        attr = subscription.anchor
+        if attr is None:
+            self.unfiltered.add(subscription)
+            return
+        self.anchored[attr].add(subscription)
+        for value in subscription.filters[attr]:
+            self.by_value[(attr, value)].add(subscription)
+
+    def remove(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+        attr = subscription.anchor
+        if attr is None:
+            self.unfiltered.discard(subscription)
+            return
+        self.anchored[attr].discard(subscription)
+        if not self.anchored[attr]:
+            del self.anchored[attr]
+        for value in subscription.filters[attr]:
+            key = (attr, value)
+            self.by_value[key].discard(subscription)
+            if not self.by_value[key]:
+                del self.by_value[key]
+
+    def match(self, scope: dict | None) -> list:
+        """Subscriptions receiving an event of `scope`, every one for RESYNC (no scope)."""
+        if scope is None:
+            return list(self.subscriptions)
+        candidates = set(self.unfiltered)
+        for attr, subscriptions in self.anchored.items():
+            values = scope.get(attr)
+            if values is None:
+                candidates |= subscriptions
+                continue
+            for value in values:
+                candidates |= self.by_value.get((attr, value), set())
+        return [subscription for subscription in candidates if subscription.matches(scope)]
+
+
+class Dispatcher:
+    """Receives the events of a websocket server process and hands them to its subscriptions."""
+
+    def __init__(self):
+        self.indexes: dict[str, SubscriptionIndex] = {}
+        self.channel_name: str | None = None
+        self._tasks: list[asyncio.Task] = []
+        # table -> (origin, last sequence number) of the messages received
+        self.sequences: dict = {}
+        self.tables: dict = defaultdict(lambda: {"delivered": 0, "sent": 0, "lost": 0})
+        self.latencies = metrics.Latencies()
+
+    async def subscribe(self, table: str, subscription: Subscription):
+        channel_layer = get_channel_layer()
+        if self.channel_name is None:
+            self.channel_name = await channel_layer.new_channel()
+            self._tasks = [
+                asyncio.create_task(self._run()),
+                asyncio.create_task(self._refresh_groups()),
+                asyncio.create_task(self._report_metrics()),
+            ]
+        if table not in self.indexes:
+            self.indexes[table] = SubscriptionIndex()
+            await channel_layer.group_add(f"realtime_{table}", self.channel_name)
+        self.indexes[table].add(subscription)
+
+    async def unsubscribe(self, table: str, subscription: Subscription):
+        index = self.indexes.get(table)
+        if index is None:
+            return
+        index.remove(subscription)
+        if not index:
+            del self.indexes[table]
+            self.sequences.pop(table, None)
+            await get_channel_layer().group_discard(f"realtime_{table}", self.channel_name)
+
+    async def dispatch(self, table: str, frame: dict, scope: dict | None):
+        index = self.indexes.get(table)
+        if index is None:
+            return
+        counters = self.tables[table]
+        counters["delivered"] += 1
+        subscriptions = index.match(scope)
+        for subscription in subscriptions:
+            try:
+                await subscription.consumer.send_frame(frame)
+                counters["sent"] += 1
+            except Exception:
+                log.warning("Failed to send a realtime frame", exc_info=True)
+        if subscriptions and "timing" in frame:
+            started, sent = frame["timing"]
+            written = time.time()
+            self.latencies.record("send_consumer", sent, written)
+            self.latencies.record("end_to_end", started, written)
+
+    def track_sequence(self, table: str, origin: str, first: int, count: int):
+        """Count the events skipped between this message and the previous one of `table`."""
+        last = self.sequences.get(table)
+        # a new listener starts its own sequence
+        if last is not None and last[0] == origin and first > last[1] + 1:
+            self.tables[table]["lost"] += first - last[1] - 1
+        self.sequences[table] = (origin, first + count - 1)
+
+    async def _run(self):
+        channel_layer = get_channel_layer()
+        while True:
+            try:
+                message = await channel_layer.receive(self.channel_name)
+                table = message["table"]
+                count = len(message["frames"]) if message["type"] == "db.events" else 1
+                self.track_sequence(table, message["origin"], message["seq"], count)
+                if message["type"] == "db.event":
+                    await self.dispatch(table, message["frame"], message["scope"])
+                elif message["type"] == "db.events":
+                    for frame, scope in zip(message["frames"], message["scopes"]):
+                        await self.dispatch(table, frame, scope)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Realtime dispatcher failed on a message")
+
+    async def _refresh_groups(self):
+        channel_layer = get_channel_layer()
+        while True:
+            await asyncio.sleep(GROUP_REFRESH)
+            for table in list(self.indexes):
+                await channel_layer.group_add(f"realtime_{table}", self.channel_name)
+
+    async def _report_metrics(self):
+        while True:
+            await asyncio.sleep(metrics.stats_interval())
+            try:
+                await metrics.publish(replica_name(), {
+                    "groups": {f"realtime_{table}": len(index) for table, index in self.indexes.items()},
+                    "tables": dict(self.tables),
+                    "latency": self.latencies.take(),
+                })
+            except Exception:
+                log.warning("Failed to publish the realtime metrics", exc_info=True)
+
+
+dispatcher = Dispatcher()
@@ -0,0 +1,61 @@
+"""
+Per-row coalescing of realtime events.
+
+Events are held for `window` seconds after the first event of their
+(table, pk) arrives.  Later events of the same row are merged into the held
+one: the merged event carries the latest record, the first event's
+`old_record` and both actions (`first_action` / `action`), so subscribers
+get one frame with the row's final state instead of one per save.
+Events without a pk (RESYNC …) are never merged.
+"""
+from collections import defaultdict
+
+
+def event_pk(data: dict):
+    if "id" in data:
+        # ID-only payload, hydrated after coalescing
+        return data["id"]
+    record = data.get("record") or data.get("old_record") or {}
+    return record.get("id")
+
+
+def merge_events(first: dict, last: dict) -> dict:
+    merged = dict(last)
+    merged["first_action"] = first.get("first_action", first["action"])
+    merged["old_record"] = first.get("old_record")
+    merged["coalesced"] = first.get("coalesced", 1) + last.get("coalesced", 1)
+    return merged
+
+
+class Coalescer:
+    def __init__(self, window: float):
+        self.window = window
+        # key -> [received, data]; dicts keep insertion order, so the
+        # oldest pending event is always first
+        self.pending: dict = {}
+        # table -> events merged into a held one
+        self.coalesced: dict = defaultdict(int)
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, received: float, data: dict):
+        pk = event_pk(data)
+        key = (data["table"], pk) if pk is not None else object()
+        entry = self.pending.get(key)
+        if entry is None:
+            self.pending[key] = [received, data]
+        else:
+            entry[1] = merge_events(entry[1], data)
+            self.coalesced[data["table"]] += 1
+
+    def pop_due(self, now: float, limit: int) -> list:
+        """Up to `limit` (received, data) pairs held for at least `window` seconds."""
+        due = []
+        for key, (received, data) in self.pending.items():
+            if len(due) >= limit or received + self.window > now:
+                break
+            due.append((key, received, data))
+        for key, _, _ in due:
+            del self.pending[key]
+        return [(received, data) for _, received, data in due]
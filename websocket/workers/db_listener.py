@@ -1,9 +1,50 @@
+"""
+PostgreSQL LISTEN worker feeding the realtime websocket groups.
+
+NOTIFY callbacks only parse and enqueue.  A fixed pool of consumer
+coroutines drains bounded queues and forwards the events in per-table
+micro-batches (one group_send per table per batch), so a bulk write no
+longer turns into thousands of concurrent tasks and group_sends.
+
+Events are sharded over the consumers by table, which keeps every table's
+events in commit order.  Each consumer holds events for
+REALTIME_COALESCE_WINDOW seconds and merges repeated changes of one row
+(see coalesce.py), checking for due events every REALTIME_BATCH_WINDOW.
+
+Batched payloads (`create_realtime_triggers --payload batch`, one NOTIFY
+with an `ids` array per statement) are split into ID-only events on
+arrival.  ID-only payloads (`--payload ids`) are hydrated
+right before forwarding, one query per table per batch, see
+websocket/hydration.py.  Every event also gets the `scope` of its row
+(object, district, companies, assignee) for filtered subscriptions, with
+one more query per table per batch.
+
+Overflow policy: when a shard's queue is full the event is dropped and
+counted against its table.  After its next batch the consumer sends one
+RESYNC event per such table, telling clients to reload the table instead
+of waiting for the rows that were dropped.
+
+Replicas: only the replica holding the advisory lock LISTENs (see
+leader.py), the others wait as standbys.  A replica that becomes active
+sends RESYNC (reason "failover") for every realtime table, since changes
+made while no replica was listening are lost.
+"""
 import asyncio
 import json
 import logging
+import time
+import zlib
+from collections import defaultdict
+
 import asyncpg
+from asgiref.sync import sync_to_async
+from django.conf import settings
 
-from websocket.router import route_db_event
+from websocket.hydration import deleted_scope, hydrate_rows, realtime_tables, row_scopes
+from websocket.metrics import Latencies, percentile
+from websocket.router import route_db_event, route_db_events
+from websocket.workers import leader
+from websocket.workers.coalesce import Coalescer, event_pk
 
 log = logging.getLogger("db_listener")
 
@@ -16,38 +57,245 @@ class DBListenerWorker:
         self.dsn = dsn
         self.conn: asyncpg.Connection | None = None
 
+        self.consumers = getattr(settings, "REALTIME_CONSUMERS", 4)
+        queue_size = getattr(settings, "REALTIME_QUEUE_SIZE", 10_000)
+        self.batch_window = getattr(settings, "REALTIME_BATCH_WINDOW", 0.05)
+        self.batch_size = getattr(settings, "REALTIME_BATCH_SIZE", 500)
+        self.coalesce_window = getattr(settings, "REALTIME_COALESCE_WINDOW", 0.25)
+        self.stats_interval = getattr(settings, "REALTIME_STATS_INTERVAL", 60)
+
+        self.queues = [asyncio.Queue(maxsize=max(queue_size // self.consumers, 1)) for _ in range(self.consumers)]
+        self.coalescers = [Coalescer(self.coalesce_window) for _ in range(self.consumers)]
+        self.overflowed: dict[str, int] = defaultdict(int)
+        self.counters = {"received": 0, "forwarded": 0, "dropped": 0, "batches": 0, "resyncs": 0, "failed": 0}
+        # batches popped from a coalescer and not forwarded yet
+        self.forwarding = 0
+        # table -> events in / out (after coalescing) / dropped on overflow
+        self.tables: dict = defaultdict(lambda: {"in": 0, "out": 0, "dropped": 0})
+        self.latencies = Latencies()
+        self.last_latencies: dict = {}
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._tasks: list[asyncio.Task] = []
+
+        self.replica = leader.replica_name()
+        self.check_interval = leader.check_interval()
+        self.state = "standby"
+        self.state_since = time.time()
+
     async def start(self):
+        self._tasks = [asyncio.create_task(self._consume(shard)) for shard in range(self.consumers)]
+        self._tasks.append(asyncio.create_task(self._report_stats()))
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
         while True:
             try:
                 await self._connect()
                 await self._listen_forever()
             except Exception as e:
                 log.exception("DB listener crashed, reconnecting...")
+                self._set_state("standby")
+                if self.conn is not None:
+                    self.conn.terminate()
+                    self.conn = None
                 await asyncio.sleep(RECONNECT_DELAY)
 
     async def _connect(self):
         log.info("Connecting to PostgreSQL...")
         self.conn = await asyncpg.connect(self.dsn)
 
+        # the lock lives as long as this connection, which is also the one listening
+        while not await leader.try_acquire(self.conn):
+            await asyncio.sleep(self.check_interval)
+
+        await self._subscribe()
+        self._set_state("active")
+
+    async def _subscribe(self):
         await self.conn.add_listener(
             PG_CHANNEL,
             self._on_notify,
         )
 
         log.info("Listening on channel: %s", PG_CHANNEL)
+        await self._send_failover_resyncs()
 
     async def _listen_forever(self):
+        # a connection that stopped answering raises here, and the replica steps down
         while True:
-            await asyncio.sleep(3600)
+            await asyncio.sleep(self.check_interval)
+            await asyncio.wait_for(self.conn.execute("SELECT 1"), self.check_interval)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            log.info("Realtime listener %s is now %s", self.replica, state)
+            self.state = state
+            self.state_since = time.time()
 
     def _on_notify(self, *args):
         payload = args[3]
 
-        asyncio.create_task(self._handle_payload(payload))
+        self.enqueue(payload)
+
+    # ── queueing ──────────────────────────────────────────────────────────────
 
-    async def _handle_payload(self, payload: str):
+    def _shard(self, table: str) -> int:
+        return zlib.crc32(table.encode()) % self.consumers
+
+    def enqueue(self, payload: str):
         try:
             data = json.loads(payload)
-            await route_db_event(data)
-        except Exception:
-            log.exception("Failed to handle payload")
+            table = data["table"]
+            # statement triggers (`--payload batch`) send the ids of all rows at once
+            ids = data.pop("ids", None)
+            events = [data] if ids is None else [{**data, "id": pk} for pk in ids]
+        except (ValueError, KeyError, TypeError):
+            self.counters["received"] += 1
+            log.exception("Invalid payload")
+            return
+
+        self.put(table, events)
+
+    def _received(self, table: str, events: list[dict]) -> list[tuple]:
+        received = time.monotonic()
+        now = time.time()
+        self.counters["received"] += len(events)
+        self.tables[table]["in"] += len(events)
+        for data in events:
+            data["ts_listener"] = now
+        return [(received, data) for data in events]
+
+    def put(self, table: str, events: list[dict]):
+        queue = self.queues[self._shard(table)]
+        for item in self._received(table, events):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self.counters["dropped"] += 1
+                self.tables[table]["dropped"] += 1
+                self.overflowed[table] += 1
+
+    async def put_wait(self, table: str, events: list[dict]):
+        """put() with backpressure: waits for room in the shard's queue instead of dropping."""
+        queue = self.queues[self._shard(table)]
+        for item in self._received(table, events):
+            await queue.put(item)
+
+    async def _consume(self, shard: int):
+        queue = self.queues[shard]
+        pending = self.coalescers[shard]
+        while True:
+            if not pending:
+                pending.add(*await queue.get())
+            await asyncio.sleep(self.batch_window)
+            # held events count against the queue size, so the queue still overflows
+            while len(pending) < queue.maxsize and not queue.empty():
+                pending.add(*queue.get_nowait())
+
+            batch = pending.pop_due(time.monotonic(), self.batch_size)
+            if not batch:
+                continue
+            self.forwarding += 1
+            try:
+                await self._forward(batch)
+                await self._send_resyncs(shard)
+            except Exception:
+                self.counters["failed"] += 1
+                log.exception("Failed to forward %d events", len(batch))
+            finally:
+                self.forwarding -= 1
+
+    def idle(self) -> bool:
+        """Whether every event put so far has been forwarded (or dropped)."""
+        return not self.forwarding and all(queue.empty() for queue in self.queues) and not any(self.coalescers)
+
+    async def _forward(self, batch: list):
+        by_table: dict[str, list] = {}
+        for _, data in batch:
+            by_table.setdefault(data["table"], []).append(data)
+        for table, events in by_table.items():
+            await self._hydrate(table, events)
+            await self._scope(table, events)
+            await route_db_events(table, events)
+            self.tables[table]["out"] += len(events)
+            for data in events:
+                self.latencies.record("trigger_listener", data.get("ts"), data["ts_listener"])
+                self.latencies.record("listener_send", data["ts_listener"], data["ts_send"])
+
+        self.lag = time.monotonic() - batch[0][0]
+        self.max_lag = max(self.max_lag, self.lag)
+        self.counters["forwarded"] += len(batch)
+        self.counters["batches"] += 1
+
+    async def _hydrate(self, table: str, events: list):
+        """Fill `record` of ID-only events from the database."""
+        pending = [data for data in events if "record" not in data and "id" in data]
+        if not pending:
+            return
+        ids = {data["id"] for data in pending if data["action"] != "DELETE"}
+        rows = await sync_to_async(hydrate_rows)(table, ids) if ids else {}
+        for data in pending:
+            data["record"] = rows.get(data["id"]) if data["action"] != "DELETE" else None
+            data["old_record"] = data.get("old_record") or {"id": data["id"]}
+
+    async def _scope(self, table: str, events: list):
+        """Attach the scope of each event's row, deleted rows get it from their old record."""
+        ids = {event_pk(data) for data in events if data["action"] != "DELETE"} - {None}
+        scopes = await sync_to_async(row_scopes)(table, ids) if ids else {}
+        for data in events:
+            scope = scopes.get(event_pk(data)) if data["action"] != "DELETE" else None
+            data["scope"] = scope if scope is not None else deleted_scope(table, data.get("old_record") or {})
+
+    async def _send_failover_resyncs(self):
+        for table in list(realtime_tables()):
+            try:
+                await route_db_event({"table": table, "action": "RESYNC", "reason": "failover"})
+            except Exception:
+                log.exception("Failed to send RESYNC for %s", table)
+
+    async def _send_resyncs(self, shard: int):
+        for table in [t for t in self.overflowed if self._shard(t) == shard]:
+            dropped = self.overflowed.pop(table)
+            await route_db_event({"table": table, "action": "RESYNC", "reason": "overflow", "dropped": dropped})
+            self.counters["resyncs"] += 1
+
+    # ── monitoring ────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        """
+        State, queue depth, held events, lag (seconds from NOTIFY to group_send),
+        event counters, per-table counters and the last window's latencies.
+        """
+        tables = {table: dict(counters, coalesced=0) for table, counters in self.tables.items()}
+        for pending in self.coalescers:
+            for table, coalesced in pending.coalesced.items():
+                tables[table]["coalesced"] += coalesced
+        return {
+            "state": self.state,
+            "state_since": self.state_since,
+            "queue_depth": sum(queue.qsize() for queue in self.queues),
+            "queue_capacity": sum(queue.maxsize for queue in self.queues),
+            "pending": sum(len(pending) for pending in self.coalescers),
+            "lag": round(self.lag, 4),
+            "max_lag": round(self.max_lag, 4),
+            **self.counters,
+            "coalesced": sum(table["coalesced"] for table in tables.values()),
+            "tables": tables,
+            "latency": self.last_latencies,
+        }
+
+    async def _report_stats(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            self.last_latencies = self.latencies.take()
+            stats = self.stats()
+            stats["latency"] = {stage: percentile(counts, 95) for stage, counts in stats["latency"].items()}
+            log.info("Realtime listener stats (latency p95 in ms): %s", stats)
+            self.max_lag = 0.0
+
+    async def _heartbeat(self):
+        while True:
+            try:
+                await leader.publish_status(self.replica, self.stats())
+            except Exception:
+                log.warning("Failed to publish the listener status", exc_info=True)
+            await asyncio.sleep(self.check_interval)
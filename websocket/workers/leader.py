@@ -0,0 +1,56 @@
+"""
+Leader election between DB listener replicas.
+
+Only one replica may LISTEN and forward, otherwise every NOTIFY reaches
+clients once per replica.  The active one holds a session-level
+PostgreSQL advisory lock on its LISTEN connection: when that connection
+or its process dies the server releases the lock, and the first standby
+retrying `pg_try_advisory_lock` (every REALTIME_LEADER_CHECK seconds)
+takes over.
+
+Every replica publishes its state and stats to a Redis hash, read by
+`manage.py realtime_listeners`.
+"""
+import json
+import os
+import socket
+import time
+import zlib
+
+from django.conf import settings
+
+from websocket.replay import client
+
+LOCK_KEY = zlib.crc32(b"websocket.db_listener")
+STATUS_KEY = "realtime:listeners"
+
+
+def check_interval() -> float:
+    return getattr(settings, "REALTIME_LEADER_CHECK", 2)
+
+
+def replica_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def try_acquire(conn) -> bool:
+    return await conn.fetchval("SELECT pg_try_advisory_lock($1)", LOCK_KEY)
+
+
+async def publish_status(replica: str, status: dict):
+    await client().hset(STATUS_KEY, replica, json.dumps({**status, "heartbeat": time.time()}))
+
+
+async def read_status() -> dict:
+    """{replica: status} of live replicas; replicas silent for 5 check intervals are dropped."""
+    statuses = {}
+    stale = []
+    for replica, value in (await client().hgetall(STATUS_KEY)).items():
+        status = json.loads(value)
+        if time.time() - status["heartbeat"] > 5 * check_interval():
+            stale.append(replica)
+        else:
+            statuses[replica.decode()] = status
+    if stale:
+        await client().hdel(STATUS_KEY, *stale)
+    return statuses
@@ -0,0 +1,116 @@
+"""
+Logical-replication change feed, an alternative to triggers and NOTIFY.
+
+With REALTIME_BACKEND = "replication" the worker reads the changes of the
+realtime tables from a logical replication slot (wal2json, format
+version 2) instead of listening for NOTIFY, so writes no longer pay for a
+trigger per row (drop them with `create_realtime_triggers --drop`).  The
+server needs `wal_level = logical` and the wal2json plugin, the database
+user the REPLICATION attribute.
+
+The slot is read through the SQL interface (`pg_logical_slot_peek_changes`),
+which works over the worker's ordinary asyncpg connection.  Changes become
+ID-only events and go through the same queues, coalescing, hydration and
+`route_db_events` as NOTIFY payloads, but they wait for room in a full
+shard queue (`put_wait`) instead of being dropped: the slot keeps them,
+so the worker just reads it more slowly.  The slot is the checkpoint: it is
+advanced past a chunk of transactions only once all their events have
+been forwarded, so after a crash or a failover the next active replica
+starts again from the last checkpoint — delivery is at least once, and no
+RESYNC is needed.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from django.conf import settings
+
+from websocket.hydration import realtime_tables
+from websocket.workers.db_listener import DBListenerWorker
+
+log = logging.getLogger("db_listener")
+
+# wal2json action -> trigger operation name used by the events
+ACTIONS = {"I": "INSERT", "U": "UPDATE", "D": "DELETE"}
+
+
+def change_event(change: dict) -> dict | None:
+    """ID-only event of a wal2json change, None for transaction markers and rows without id."""
+    action = ACTIONS.get(change["action"])
+    if action is None:
+        return None
+    event = {"table": change["table"], "action": action, "schema": change["schema"]}
+    values = {column["name"]: column["value"] for column in change.get("columns", [])}
+    # key columns before the change, every column with REPLICA IDENTITY FULL
+    identity = {column["name"]: column["value"] for column in change.get("identity", [])}
+    pk = values.get("id", identity.get("id"))
+    if pk is None:
+        return None
+    event["id"] = pk
+    if identity:
+        event["old_record"] = identity
+    return event
+
+
+class ReplicationWorker(DBListenerWorker):
+    def __init__(self, dsn: str):
+        super().__init__(dsn)
+        self.slot = getattr(settings, "REALTIME_REPLICATION_SLOT", "realtime")
+        self.poll_interval = getattr(settings, "REALTIME_REPLICATION_POLL", 0.2)
+        self.chunk_size = getattr(settings, "REALTIME_REPLICATION_BATCH", 1000)
+        self.lsn: str | None = None
+
+    async def _subscribe(self):
+        exists = await self.conn.fetchval("SELECT 1 FROM pg_replication_slots WHERE slot_name = $1", self.slot)
+        if not exists:
+            await self.conn.execute("SELECT pg_create_logical_replication_slot($1, 'wal2json')", self.slot)
+            log.info("Created replication slot %s", self.slot)
+        self.lsn = await self.conn.fetchval(
+            "SELECT confirmed_flush_lsn::text FROM pg_replication_slots WHERE slot_name = $1", self.slot
+        )
+        log.info("Reading replication slot %s from %s", self.slot, self.lsn)
+
+    async def _listen_forever(self):
+        tables = ",".join(f"*.{table}" for table in realtime_tables())
+        while True:
+            rows = await self.conn.fetch(
+                "SELECT lsn::text, data FROM pg_logical_slot_peek_changes($1, NULL, $2, "
+                "'format-version', '2', 'include-transaction', 'true', 'include-timestamp', 'true', "
+                "'add-tables', $3)",
+                self.slot, self.chunk_size, tables,
+            )
+            if not rows:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self._process(rows)
+
+    async def _process(self, rows):
+        failed, dropped = self.counters["failed"], self.counters["dropped"]
+        commit_lsn = None
+        committed = None
+        for row in rows:
+            change = json.loads(row["data"])
+            if change["action"] == "B":
+                # commit time of the transaction, the start of its events' latency
+                committed = datetime.fromisoformat(change["timestamp"]).timestamp() if "timestamp" in change else None
+                continue
+            if change["action"] == "C":
+                # the commit row's lsn is the end of its transaction
+                commit_lsn = row["lsn"]
+                continue
+            event = change_event(change)
+            if event is not None:
+                event["ts"] = committed
+                await self.put_wait(event["table"], [event])
+
+        while not self.idle():
+            await asyncio.sleep(self.batch_window)
+        if self.counters["failed"] != failed or self.counters["dropped"] != dropped:
+            raise RuntimeError(f"Events were lost, re-reading slot {self.slot} from {self.lsn}")
+        if commit_lsn is not None:
+            await self.conn.execute("SELECT pg_replication_slot_advance($1, $2::text::pg_lsn)", self.slot, commit_lsn)
+            self.lsn = commit_lsn
+
+    def stats(self) -> dict:
+        return {**super().stats(), "lsn": self.lsn}